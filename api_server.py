@@ -7,19 +7,19 @@ Provides endpoints for document processing, chat, summaries, flashcards, and mor
 """
 
 import os
+import io
 import json
 import tempfile
 import zipfile
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import asyncio
 from pathlib import Path
 import re
-import shutil
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
@@ -456,7 +456,10 @@ async def generate_flashcards(request: FlashcardRequest):
         chunks = vector_store.get_all_chunks(session['vector_store_path'])
         
         # Generate flashcards
-        flashcards = ai_assistant.generate_flashcards(chunks, request.num_cards)
+        flashcards = ai_assistant.generate_flashcards(
+            chunks, request.num_cards,
+            chunk_embeddings=vector_store.get_chunk_embeddings(request.session_id)
+        )
         
         # Store flashcards
         flashcard_set = {
@@ -492,7 +495,8 @@ async def generate_quiz(request: QuizRequest):
         quiz_result = ai_assistant.generate_quiz(
             chunks, 
             request.num_questions, 
-            request.difficulty
+            request.difficulty,
+            chunk_embeddings=vector_store.get_chunk_embeddings(request.session_id)
         )
         
         # Store quiz
@@ -572,84 +576,96 @@ Return **only** the bullet list – no title, no commentary."""
 
 @app.post("/export")
 async def export_session(request: ExportRequest):
-    """Export session data in various formats."""
+    """Export session data in various formats, streamed as a ZIP while it is built."""
     session = get_session(request.session_id)
     
+    # Read and render every entry before streaming starts: once the response has begun, an
+    # error can only cut the download short instead of returning a 500
     try:
-        temp_dir = tempfile.mkdtemp()
-        export_files = []
-
-        try:
-            # Export summaries as Markdown
-            if 'summaries' in request.export_options and session['summaries']:
-                summary_file = os.path.join(temp_dir, 'summaries.md')
-                with open(summary_file, 'w', encoding='utf-8') as f:
-                    f.write("# Kensho Session Summaries\n\n")
-                    for i, summary in enumerate(session['summaries'], 1):
-                        f.write(f"## Summary {i} ({summary['type']})\n\n")
-                        f.write(f"{summary['content']}\n\n")
-                        f.write(f"**Key Topics:** {', '.join(summary['key_topics'])}\n\n")
-                        f.write("---\n\n")
-                export_files.append(summary_file)
-
-            # Export chat history as JSON
-            if 'chat' in request.export_options and session['chat_history']:
-                chat_file = os.path.join(temp_dir, 'chat_history.json')
-                with open(chat_file, 'w', encoding='utf-8') as f:
-                    json.dump(session['chat_history'], f, indent=2, ensure_ascii=False)
-                export_files.append(chat_file)
-
-            # Export flashcards as CSV
-            if 'flashcards' in request.export_options and session['flashcards']:
-                flashcard_file = os.path.join(temp_dir, 'flashcards.csv')
-                with open(flashcard_file, 'w', encoding='utf-8') as f:
-                    f.write("Front,Back,Level,Tags\n")
-                    for card_set in session['flashcards']:
-                        for card in card_set['cards']:
-                            f.write(f'"{card["front"]}","{card["back"]}","{card["level"]}","{",".join(card.get("tags", []))}"\n')
-                export_files.append(flashcard_file)
-
-            # Create ZIP file
-            zip_handle = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            zip_path = zip_handle.name
-            zip_handle.close()
-
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for file_path in export_files:
-                    zipf.write(file_path, os.path.basename(file_path))
-
-                # Add session metadata
-                metadata = {
-                    'session_id': request.session_id,
-                    'created_at': session['created_at'],
-                    'exported_at': datetime.now().isoformat(),
-                    'documents': session['documents'],
-                    'stats': {
-                        'total_documents': len(session['documents']),
-                        'chat_messages': len(session['chat_history']),
-                        'summaries': len(session['summaries']),
-                        'flashcards': sum(len(fs['cards']) for fs in session['flashcards']),
-                        'quizzes': len(session['quizzes'])
-                    }
-                }
-
-                zipf.writestr('session_metadata.json', json.dumps(metadata, indent=2))
+        entries = _export_entries(session, request.session_id, request.export_options)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting session: {str(e)}")
+    
+    return StreamingResponse(
+        _iter_export_zip(entries),
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="kensho_session_{request.session_id}.zip"'}
+    )
 
-            # Return the ZIP file and clean it up afterwards
-            from starlette.background import BackgroundTask
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only sink for ZipFile whose contents are drained after each entry."""
+    
+    def __init__(self):
+        self._parts: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+def _export_entries(session: Dict[str, Any], session_id: str, export_options: List[str]) -> List[Tuple[str, str]]:
+    """Render the export's files as (archive name, content) pairs."""
+    entries = []
+    
+    # Export summaries as Markdown
+    if 'summaries' in export_options and session['summaries']:
+        parts = ["# Kensho Session Summaries\n\n"]
+        for i, summary in enumerate(session['summaries'], 1):
+            parts.append(f"## Summary {i} ({summary['type']})\n\n")
+            parts.append(f"{summary['content']}\n\n")
+            parts.append(f"**Key Topics:** {', '.join(summary['key_topics'])}\n\n")
+            parts.append("---\n\n")
+        entries.append(('summaries.md', "".join(parts)))
+    
+    # Export chat history as JSON
+    if 'chat' in export_options and session['chat_history']:
+        entries.append(('chat_history.json', json.dumps(session['chat_history'], indent=2, ensure_ascii=False)))
+    
+    # Export flashcards as CSV
+    if 'flashcards' in export_options and session['flashcards']:
+        rows = ["Front,Back,Level,Tags\n"]
+        for card_set in session['flashcards']:
+            for card in card_set['cards']:
+                rows.append(f'"{card["front"]}","{card["back"]}","{card["level"]}","{",".join(card.get("tags", []))}"\n')
+        entries.append(('flashcards.csv', "".join(rows)))
+    
+    # Add session metadata
+    metadata = {
+        'session_id': session_id,
+        'created_at': session['created_at'],
+        'exported_at': datetime.now().isoformat(),
+        'documents': session['documents'],
+        'stats': {
+            'total_documents': len(session['documents']),
+            'chat_messages': len(session['chat_history']),
+            'summaries': len(session['summaries']),
+            'flashcards': sum(len(fs['cards']) for fs in session['flashcards']),
+            'quizzes': len(session['quizzes'])
+        }
+    }
+    entries.append(('session_metadata.json', json.dumps(metadata, indent=2)))
+    
+    return entries
 
-            return FileResponse(
-                zip_path,
-                media_type='application/zip',
-                filename=f'kensho_session_{request.session_id}.zip',
-                background=BackgroundTask(lambda: os.remove(zip_path))
-            )
-        finally:
-            # Clean the temp dir holding intermediate export files
-            shutil.rmtree(temp_dir, ignore_errors=True)
+def _iter_export_zip(entries: List[Tuple[str, str]]):
+    """Yield the export ZIP entry by entry; nothing is staged on disk."""
+    buffer = _ZipStreamBuffer()
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error exporting session: {str(e)}")
+    # ZipFile falls back to data descriptors on an unseekable sink, so entries can be flushed as written
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+        for name, content in entries:
+            zipf.writestr(name, content)
+            yield buffer.drain()
+    
+    # Central directory is written when the archive closes
+    yield buffer.drain()
 
 # Error handlers
 @app.exception_handler(HTTPException)
@@ -673,7 +689,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="🌌 Kensho FastAPI Server")
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
-    parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument("--reload", action="store_true", default=os.getenv("KENSHO_RELOAD", "0") == "1",
+                        help="Enable auto-reload (development only; also KENSHO_RELOAD=1)")
     
     args = parser.parse_args()
     
@@ -682,6 +699,7 @@ if __name__ == "__main__":
     print(f"📚 API Docs: http://{args.host}:{args.port}/docs")
     print("🧘‍♂️ Ready for mindful learning!")
     
+    # Single worker process: sessions and index builds live in this process's memory
     uvicorn.run(
         "api_server:app",
         host=args.host,
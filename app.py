@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from kensho import create_kensho_app
+from kensho.ui import static_routes
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -108,7 +109,9 @@ Environment Variables:
         "favicon_path": None,  # Could add a custom favicon
         "app_kwargs": {
             "title": "🌌 Kensho - AI Learning Mirror",
-            "description": "Your personal AI mirror for deep learning and awakening"
+            "description": "Your personal AI mirror for deep learning and awakening",
+            # Serves the cacheable stylesheet the interface links to
+            "routes": static_routes()
         }
     }
     
@@ -12,10 +12,25 @@ __version__ = "1.0.0"
 __author__ = "Kensho AI"
 __description__ = "Privacy-first AI learning assistant for deep understanding"
 
-from .document_processor import DocumentProcessor
-from .vector_store import KenshoVectorStore
-from .ai_assistant import KenshoAIAssistant
-from .ui import KenshoUI, create_kensho_app
+import importlib
+
+# Public names and the submodule defining each. Submodules are imported on first access, so
+# importing one of them (e.g. the API server's use of the vector store) doesn't pull in Gradio
+_EXPORTS = {
+    "DocumentProcessor": ".document_processor",
+    "KenshoVectorStore": ".vector_store",
+    "KenshoAIAssistant": ".ai_assistant",
+    "KenshoUI": ".ui",
+    "create_kensho_app": ".ui",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "DocumentProcessor",
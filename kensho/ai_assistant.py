@@ -5,17 +5,162 @@ Handles RAG-based QA, summarization, flashcard generation, and quiz creation.
 """
 
 import os
-import json
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import math
+import heapq
+import time
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Generator, AsyncGenerator, Union
 from datetime import datetime
 
+import httpx
+import json5
+import numpy as np
+import orjson
+import tiktoken
+
 # AI services
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Local embedding model for the semantic cache, confidence and chunk selection
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+
+# Maximal Marginal Relevance trade-off between relevance (1.0) and diversity (0.0)
+MMR_LAMBDA = 0.5
+
+# Without stored chunk vectors, at most this many chunks (spread across the document) are embedded for selection
+SELECTION_MAX_CANDIDATES = 256
+
+# Semantic response cache: paraphrased questions whose embeddings are at least
+# this similar (cosine) to a cached one reuse the cached answer.
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+
+# Exact-match cache for byte-identical generation requests
+RESPONSE_CACHE_MAX_ENTRIES = 512
+
+# Citation markers embedded in model output
+_PAGE_CITE_RE = re.compile(r'\[source: page (\d+)\]')
+_TIME_CITE_RE = re.compile(r'\[timestamp: (\d{2}:\d{2})\]')
+
+# System prompts
+_RAG_SYSTEM_PROMPT = """
+You are 'Kensho', a friendly and knowledgeable AI Tutor. Your goal is to help users understand their documents and learn new concepts.
+
+Your personality:
+- Patient, encouraging, and adaptive.
+- You break down complex topics into simple, digestible pieces.
+- You ask clarifying questions to check for understanding and guide the user's learning.
+- You can be a bit informal and use emojis to make learning more engaging.
+
+How you'll answer:
+1.  **Use the Provided CONTEXT First**: Incorporate relevant excerpts from the documents the user uploaded to ground your answer, but you no longer need to insert explicit citation tags.
+2.  **Bring in General Knowledge When Needed**: If the CONTEXT is sparse or the question goes beyond it, add helpful background from your broader knowledge. Preface these parts with phrases like "From my general knowledge..." so the learner knows the origin.
+3.  **Stay Conversational**: Weave your replies into the ongoing chat, referencing earlier turns so the conversation feels continuous and natural.
+4.  **Guide, Don't Just Answer**: Coach the learner. Break complex ideas into steps, ask clarifying questions, and suggest next learning actions.
+5.  **Be Honest About Uncertainty**: If you're not sure, say so plainly and propose follow-up steps (e.g., "We could look this up with a web search tool").
+"""
+
+_SUMMARY_SYSTEM_PROMPTS = {
+    "comprehensive": """
+You are a meticulous academic assistant. Your task is to create a comprehensive, detailed summary of the provided text.
+- Capture all main arguments, key evidence, and conclusions.
+- Preserve the original nuance and tone.
+- Organize the summary logically with clear paragraphs.
+- Mention any important figures, data, or examples.
+""",
+    "key_points": """
+You are a productivity expert. Your task is to extract the most critical key points from the text and present them as a concise bulleted list.
+- Each bullet point should represent a single, core idea.
+- Start each point with a strong action verb if possible.
+- Focus on actionable insights, main findings, or critical definitions.
+""",
+    "executive": """
+You are a strategy consultant briefing a busy executive. Your task is to provide a short, high-level executive summary.
+- Start with a one-sentence summary of the main outcome or conclusion.
+- Briefly cover the core problem, methodology, and key findings.
+- Focus on the "so what?" – the implications and strategic importance.
+- Keep it concise and to the point.
+""",
+}
+
+# Generation prompt templates, filled with str.format
+_SUMMARY_USER_PROMPT = """
+Please create a {summary_type} summary of the following text.
+Keep the summary under {max_length} words and maintain the key insights and important details.
+
+TEXT TO SUMMARIZE:
+{text}
+"""
+
+_FLASHCARD_SYSTEM_PROMPT = """
+You are an expert educator creating flashcards based on Bloom's taxonomy.
+Create flashcards that test different levels of understanding:
+- Remember: Basic recall of facts
+- Understand: Comprehension of concepts
+- Apply: Using knowledge in new situations
+- Analyze: Breaking down information
+- Evaluate: Making judgments
+- Create: Producing new ideas
+
+Format each flashcard as JSON with 'question', 'answer', 'difficulty', and 'bloom_level' fields.
+Make questions clear, specific, and educational.
+"""
+
+_FLASHCARD_USER_PROMPT = """
+Based on the following content, create {num_cards} educational flashcards.
+Vary the difficulty and cognitive levels according to Bloom's taxonomy.
+
+CONTENT:
+{content}
+
+Return the flashcards as a JSON array.
+"""
+
+_QUIZ_SYSTEM_PROMPT = """
+You are an expert educator creating a multiple-choice quiz.
+Create {num_questions} questions with {difficulty} difficulty level.
+
+Each question should have:
+- A clear, specific question
+- 4 multiple choice options
+- One correct answer
+- A detailed explanation of why the answer is correct
+
+Format as JSON with 'question', 'options', 'correct_answer', 'explanation', and 'difficulty' fields.
+"""
+
+_QUIZ_USER_PROMPT = """
+Based on the following content, create a {num_questions}-question multiple-choice quiz.
+
+CONTENT:
+{content}
+
+Return the quiz as a JSON object with a 'questions' array.
+"""
+
+# Fallback topic extraction: quoted phrases and Capitalised Noun Phrases
+_QUOTED_PHRASE_RE = re.compile(r'"(.*?)"')
+_TOPIC_RE = re.compile(r'\b[A-Z][a-z]{3,}(?:\s+[A-Z][a-z]+)*\b')
+
+# Prompt input budgets, in tokens
+SUMMARY_INPUT_TOKENS = 6000
+GENERATION_INPUT_TOKENS = 1500
+TOPICS_INPUT_TOKENS = 1000
+TOKENIZER_MODEL = "gpt-4o-mini"
+
+# Flashcard/quiz generation is split into small requests issued in parallel
+ITEMS_PER_REQUEST = 3
+MAX_CONCURRENT_REQUESTS = 10
+
 
 class KenshoAIAssistant:
     """AI-powered assistant for learning and content generation."""
@@ -24,22 +169,64 @@ class KenshoAIAssistant:
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
+        # Shared keep-alive HTTP/2 connection pool for all LLM requests, so concurrent
+        # flashcard/quiz batches are multiplexed instead of paying a TLS handshake each
+        self._http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        
+        # Async counterpart used by event-loop callers (UI chat), with its own connection pool
+        self._async_http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        
         # Initialize AI clients
         if self.gemini_api_key:
             self.gemini_client = OpenAI(
                 api_key=self.gemini_api_key,
-                base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+                base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+                http_client=self._http_client
+            )
+            self.gemini_async_client = AsyncOpenAI(
+                api_key=self.gemini_api_key,
+                base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+                http_client=self._async_http_client
             )
         
         if self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            self.openai_client = OpenAI(api_key=self.openai_api_key, http_client=self._http_client)
+            self.openai_async_client = AsyncOpenAI(api_key=self.openai_api_key, http_client=self._async_http_client)
         
         # Default model selection
         self.default_model = "gemini-2.0-flash" if self.gemini_api_key else "gpt-4o-mini"
         self.client = self.gemini_client if self.gemini_api_key else self.openai_client
+        self.async_client = self.gemini_async_client if self.gemini_api_key else self.openai_async_client
+        
+        # Semantic response cache, keyed by (session_id, kind) -> [(embedding, result)]
+        self._semantic_cache: Dict[Tuple[str, str], List[Tuple[np.ndarray, Dict]]] = {}
+        self._embedder = None
+        
+        # Exact-match LRU cache for summaries, flashcards, quizzes and explanations
+        self._response_cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        
+        # UI handlers run concurrently; both caches are only touched under this lock
+        self._cache_lock = threading.Lock()
+        
+        # Tokenizer used to truncate prompt inputs, loaded on first use
+        self._encoder = None
+        
+        # Background workers for answer post-processing that can overlap the LLM call
+        self._background = ThreadPoolExecutor(max_workers=4)
+        self._async_warmed = False
     
     def answer_question(self, question: str, context_chunks: List[Dict],
-                       chat_history: List[Dict] = None) -> Dict[str, Any]:
+                       chat_history: List[Dict] = None,
+                       session_id: str = None,
+                       query_embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Answer a question using RAG with citation-aware responses, maintaining conversation history.
 
@@ -47,75 +234,189 @@ class KenshoAIAssistant:
             question: User's question
             context_chunks: Relevant chunks from vector search
             chat_history: Previous messages in the conversation for context
+            session_id: Session the question belongs to; enables the semantic response cache
+            query_embedding: Unit-normalized question embedding from EMBEDDING_MODEL, if the caller has one
 
         Returns:
             Dict with answer, sources, and confidence
         """
         try:
-            # Prepare context
-            context_text = self._prepare_context(context_chunks)
+            # Paraphrases of an earlier question in the same session skip the LLM call.
+            # Follow-ups that depend on chat history are never served from the cache.
+            cache_key = (session_id, "answer") if session_id and not chat_history else None
+            cached, query_embedding = self._semantic_cache_lookup(cache_key, question, query_embedding)
+            if cached:
+                return cached
 
-            # Create system prompt
-            system_prompt = self._get_rag_system_prompt()
-
-            # Build conversation history for the model
-            messages = []
-            if chat_history:
-                for entry in chat_history[-5:]: # Use last 5 turns
-                    messages.append({"role": "user", "content": entry["user_message"]})
-                    messages.append({"role": "assistant", "content": entry["ai_response"]})
-
-            # Create user prompt
-            user_prompt = f"""
-            Here is the relevant context from the document(s):
-            ---
-            CONTEXT:
-            {context_text}
-            ---
-            Based on the context and our conversation so far, please answer my question.
-
-            QUESTION: {question}
-            """
-            messages.append({"role": "user", "content": user_prompt})
+            # Confidence only depends on the retrieved chunks; compute it while the model answers
+            confidence_future = self._background.submit(self._calculate_confidence, context_chunks, question)
 
             # Generate response
             response = self.client.chat.completions.create(
                 model=self.default_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    *messages
-                ],
+                messages=self._build_answer_messages(question, context_chunks, chat_history),
                 temperature=0.5, # Slightly more creative for tutoring
                 max_tokens=1500
             )
 
             answer = response.choices[0].message.content
 
-            # Extract citations and sources
-            sources = self._extract_sources_from_chunks(context_chunks)
-            citations = self._extract_citations_from_answer(answer)
+            result = self._build_answer_result(answer, context_chunks, question, confidence_future)
+            self._semantic_cache_store(cache_key, query_embedding, result)
             
-            # Calculate confidence based on context relevance
-            confidence = self._calculate_confidence(context_chunks, question)
+            return result
             
-            return {
-                'answer': answer,
-                'sources': sources,
-                'citations': citations,
-                'confidence': confidence,
-                'context_chunks_used': len(context_chunks),
-                'timestamp': datetime.now().isoformat()
-            }
+        except Exception as e:
+            return self._answer_error_result(e)
+    
+    def answer_question_stream(self, question: str, context_chunks: List[Dict],
+                               chat_history: List[Dict] = None,
+                               session_id: str = None,
+                               query_embedding: Optional[np.ndarray] = None) -> Generator[Union[str, Dict[str, Any]], None, None]:
+        """
+        Streaming variant of answer_question.
+
+        Yields answer text deltas as they arrive from the model, then a final dict
+        shaped like answer_question's result with an extra 'timing' entry
+        (time to first token and total time, in milliseconds).
+        """
+        try:
+            start_time = time.perf_counter()
+            
+            cache_key = (session_id, "answer") if session_id and not chat_history else None
+            cached, query_embedding = self._semantic_cache_lookup(cache_key, question, query_embedding)
+            if cached:
+                yield cached['answer']
+                elapsed_ms = round((time.perf_counter() - start_time) * 1000, 1)
+                cached['timing'] = {'ttft_ms': elapsed_ms, 'total_ms': elapsed_ms}
+                yield cached
+                return
+
+            confidence_future = self._background.submit(self._calculate_confidence, context_chunks, question)
+
+            response = self.client.chat.completions.create(
+                model=self.default_model,
+                messages=self._build_answer_messages(question, context_chunks, chat_history),
+                temperature=0.5,
+                max_tokens=1500,
+                stream=True
+            )
+
+            answer_parts = []
+            ttft_ms = None
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - start_time) * 1000, 1)
+                    answer_parts.append(delta)
+                    yield delta
+
+            answer = "".join(answer_parts)
+
+            result = self._build_answer_result(answer, context_chunks, question, confidence_future)
+            self._semantic_cache_store(cache_key, query_embedding, result)
+            
+            yield dict(result, timing={
+                'ttft_ms': ttft_ms,
+                'total_ms': round((time.perf_counter() - start_time) * 1000, 1)
+            })
             
         except Exception as e:
-            return {
-                'answer': f"Error generating answer: {str(e)}",
-                'sources': [],
-                'citations': [],
-                'confidence': 0.0,
-                'context_chunks_used': 0,
-                'timestamp': datetime.now().isoformat()
-            }
+            yield self._answer_error_result(e)
+    
+    async def aanswer_question(self, question: str, context_chunks: List[Dict],
+                               chat_history: List[Dict] = None,
+                               session_id: str = None,
+                               query_embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Async variant of answer_question for callers running on an event loop."""
+        try:
+            cache_key = (session_id, "answer") if session_id and not chat_history else None
+            # Embedding for the cache lookup is CPU work; keep it off the event loop
+            cached, query_embedding = await asyncio.to_thread(
+                self._semantic_cache_lookup, cache_key, question, query_embedding
+            )
+            if cached:
+                return cached
+
+            confidence_future = self._background.submit(self._calculate_confidence, context_chunks, question)
+
+            response = await self.async_client.chat.completions.create(
+                model=self.default_model,
+                messages=self._build_answer_messages(question, context_chunks, chat_history),
+                temperature=0.5,
+                max_tokens=1500
+            )
+
+            answer = response.choices[0].message.content
+
+            result = await asyncio.to_thread(
+                self._build_answer_result, answer, context_chunks, question, confidence_future
+            )
+            self._semantic_cache_store(cache_key, query_embedding, result)
+            
+            return result
+            
+        except Exception as e:
+            return self._answer_error_result(e)
+    
+    async def aanswer_question_stream(self, question: str, context_chunks: List[Dict],
+                                      chat_history: List[Dict] = None,
+                                      session_id: str = None,
+                                      query_embedding: Optional[np.ndarray] = None) -> AsyncGenerator[Union[str, Dict[str, Any]], None]:
+        """Async variant of answer_question_stream; yields the same deltas and final dict."""
+        try:
+            start_time = time.perf_counter()
+            
+            cache_key = (session_id, "answer") if session_id and not chat_history else None
+            cached, query_embedding = await asyncio.to_thread(
+                self._semantic_cache_lookup, cache_key, question, query_embedding
+            )
+            if cached:
+                yield cached['answer']
+                elapsed_ms = round((time.perf_counter() - start_time) * 1000, 1)
+                cached['timing'] = {'ttft_ms': elapsed_ms, 'total_ms': elapsed_ms}
+                yield cached
+                return
+
+            confidence_future = self._background.submit(self._calculate_confidence, context_chunks, question)
+
+            response = await self.async_client.chat.completions.create(
+                model=self.default_model,
+                messages=self._build_answer_messages(question, context_chunks, chat_history),
+                temperature=0.5,
+                max_tokens=1500,
+                stream=True
+            )
+
+            answer_parts = []
+            ttft_ms = None
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - start_time) * 1000, 1)
+                    answer_parts.append(delta)
+                    yield delta
+
+            answer = "".join(answer_parts)
+
+            result = await asyncio.to_thread(
+                self._build_answer_result, answer, context_chunks, question, confidence_future
+            )
+            self._semantic_cache_store(cache_key, query_embedding, result)
+            
+            yield dict(result, timing={
+                'ttft_ms': ttft_ms,
+                'total_ms': round((time.perf_counter() - start_time) * 1000, 1)
+            })
+            
+        except Exception as e:
+            yield self._answer_error_result(e)
     
     def generate_summary(self, full_text: str, summary_type: str = "comprehensive", 
                         max_length: int = 500) -> Dict[str, Any]:
@@ -131,111 +432,140 @@ class KenshoAIAssistant:
             Dict with summary and metadata
         """
         try:
-            # Create system prompt based on summary type
-            system_prompt = self._get_summary_system_prompt(summary_type)
-            
-            # Create user prompt
-            user_prompt = f"""
-            Please create a {summary_type} summary of the following text.
-            Keep the summary under {max_length} words and maintain the key insights and important details.
-            
-            TEXT TO SUMMARIZE:
-            {full_text[:8000]}  # Limit input to prevent token overflow
-            """
+            cache_key = ("summary", self._hash_text(full_text), summary_type, max_length)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                return cached
             
             # Generate summary
             response = self.client.chat.completions.create(
                 model=self.default_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._build_summary_messages(full_text, summary_type, max_length),
                 temperature=0.2,
                 max_tokens=800
             )
             
             summary = response.choices[0].message.content
             
-            # Extract key topics
-            topics = self._extract_key_topics(summary)
+            result = self._build_summary_result(summary, summary_type)
+            self._response_cache_put(cache_key, result)
             
-            return {
-                'summary': summary,
-                'type': summary_type,
-                'word_count': len(summary.split()),
-                'key_topics': topics,
-                'timestamp': datetime.now().isoformat()
-            }
+            return result
             
         except Exception as e:
-            return {
-                'summary': f"Error generating summary: {str(e)}",
-                'type': summary_type,
-                'word_count': 0,
-                'key_topics': [],
-                'timestamp': datetime.now().isoformat()
-            }
+            return self._summary_error_result(e, summary_type)
+    
+    def generate_summary_stream(self, full_text: str, summary_type: str = "comprehensive",
+                                max_length: int = 500) -> Generator[Union[str, Dict[str, Any]], None, None]:
+        """
+        Streaming variant of generate_summary.
+
+        Yields summary text deltas as they arrive, then the final result dict
+        (summary, key topics, word count) exactly as generate_summary returns it.
+        """
+        try:
+            cache_key = ("summary", self._hash_text(full_text), summary_type, max_length)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                yield cached['summary']
+                yield cached
+                return
+            
+            response = self.client.chat.completions.create(
+                model=self.default_model,
+                messages=self._build_summary_messages(full_text, summary_type, max_length),
+                temperature=0.2,
+                max_tokens=800,
+                stream=True
+            )
+            
+            summary_parts = []
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    summary_parts.append(delta)
+                    yield delta
+            
+            result = self._build_summary_result("".join(summary_parts), summary_type)
+            self._response_cache_put(cache_key, result)
+            
+            yield result
+            
+        except Exception as e:
+            yield self._summary_error_result(e, summary_type)
+    
+    def _build_summary_messages(self, full_text: str, summary_type: str, max_length: int) -> List[Dict]:
+        """System prompt for the summary type plus the token-truncated document."""
+        user_prompt = _SUMMARY_USER_PROMPT.format(
+            summary_type=summary_type,
+            max_length=max_length,
+            text=self._truncate_tokens(full_text, SUMMARY_INPUT_TOKENS)
+        )
+        
+        return [
+            {"role": "system", "content": self._get_summary_system_prompt(summary_type)},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _build_summary_result(self, summary: str, summary_type: str) -> Dict[str, Any]:
+        """Attach key topics and word count to a generated summary."""
+        return {
+            'summary': summary,
+            'type': summary_type,
+            'word_count': len(summary.split()),
+            'key_topics': self._extract_key_topics(summary),
+            'timestamp': datetime.now().isoformat()
+        }
     
-    def generate_flashcards(self, chunks: List[Dict], num_cards: int = 10) -> List[Dict]:
+    def _summary_error_result(self, error: Exception, summary_type: str) -> Dict[str, Any]:
+        """Result returned by generate_summary when generation fails."""
+        return {
+            'summary': f"Error generating summary: {str(error)}",
+            'type': summary_type,
+            'word_count': 0,
+            'key_topics': [],
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def generate_flashcards(self, chunks: List[Dict], num_cards: int = 10,
+                            chunk_embeddings: Optional[np.ndarray] = None) -> List[Dict]:
         """
         Generate flashcards from document chunks using Bloom's taxonomy.
         
         Args:
             chunks: Document chunks to generate flashcards from
             num_cards: Number of flashcards to generate
+            chunk_embeddings: Unit vectors for chunks, one row each (e.g. from the session index)
             
         Returns:
             List of flashcard dictionaries
         """
         try:
-            # Select diverse chunks for flashcard generation
-            selected_chunks = self._select_diverse_chunks(chunks, num_cards)
-            
-            # Prepare content for flashcard generation
-            content = "\n\n".join([chunk['text'] for chunk in selected_chunks])
-            
-            system_prompt = """
-            You are an expert educator creating flashcards based on Bloom's taxonomy.
-            Create flashcards that test different levels of understanding:
-            - Remember: Basic recall of facts
-            - Understand: Comprehension of concepts
-            - Apply: Using knowledge in new situations
-            - Analyze: Breaking down information
-            - Evaluate: Making judgments
-            - Create: Producing new ideas
-            
-            Format each flashcard as JSON with 'question', 'answer', 'difficulty', and 'bloom_level' fields.
-            Make questions clear, specific, and educational.
-            """
-            
-            user_prompt = f"""
-            Based on the following content, create {num_cards} educational flashcards.
-            Vary the difficulty and cognitive levels according to Bloom's taxonomy.
-            
-            CONTENT:
-            {content[:6000]}  # Limit content to prevent token overflow
+            cache_key = ("flashcards", self._hash_chunks(chunks), num_cards)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                return cached
             
-            Return the flashcards as a JSON array.
-            """
+            # Select diverse chunks for flashcard generation
+            selected_chunks = self._select_diverse_chunks(chunks, num_cards, chunk_embeddings)
             
-            response = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.4,
-                max_tokens=2000
-            )
+            # One small request per batch of cards, issued concurrently
+            batches = self._split_into_batches(selected_chunks, num_cards)
+            results = self._run_batches_concurrently(self._generate_flashcard_batch, batches)
             
-            # Parse flashcards from response
-            flashcards = self._parse_flashcards_response(response.choices[0].message.content)
+            flashcards = [card for batch_cards in results for card in batch_cards]
+            valid_cards = [card for card in flashcards if card.get('difficulty') != "error"]
+            flashcards = (valid_cards or flashcards)[:int(num_cards)]
             
-            # Add metadata to each flashcard
+            # Renumber cards across batches
             for i, card in enumerate(flashcards):
                 card['id'] = i + 1
-                card['created_at'] = datetime.now().isoformat()
-                card['source_chunks'] = [chunk['id'] for chunk in selected_chunks]
+            
+            # Don't pin a failed parse in the cache; the next attempt should retry
+            if not any(card.get('difficulty') == "error" for card in flashcards):
+                self._response_cache_put(cache_key, flashcards)
             
             return flashcards
             
@@ -251,7 +581,7 @@ class KenshoAIAssistant:
             }]
     
     def generate_quiz(self, chunks: List[Dict], num_questions: int = 5, 
-                     difficulty: str = "mixed") -> Dict[str, Any]:
+                     difficulty: str = "mixed", chunk_embeddings: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Generate a multiple-choice quiz from document chunks.
         
@@ -259,51 +589,30 @@ class KenshoAIAssistant:
             chunks: Document chunks to generate quiz from
             num_questions: Number of questions to generate
             difficulty: Quiz difficulty (easy, medium, hard, mixed)
+            chunk_embeddings: Unit vectors for chunks, one row each (e.g. from the session index)
             
         Returns:
             Dict with quiz questions and metadata
         """
         try:
-            # Select diverse chunks for quiz generation
-            selected_chunks = self._select_diverse_chunks(chunks, num_questions)
-            
-            # Prepare content for quiz generation
-            content = "\n\n".join([chunk['text'] for chunk in selected_chunks])
-            
-            system_prompt = f"""
-            You are an expert educator creating a multiple-choice quiz.
-            Create {num_questions} questions with {difficulty} difficulty level.
-            
-            Each question should have:
-            - A clear, specific question
-            - 4 multiple choice options
-            - One correct answer
-            - A detailed explanation of why the answer is correct
-            
-            Format as JSON with 'question', 'options', 'correct_answer', 'explanation', and 'difficulty' fields.
-            """
-            
-            user_prompt = f"""
-            Based on the following content, create a {num_questions}-question multiple-choice quiz.
+            cache_key = ("quiz", self._hash_chunks(chunks), num_questions, difficulty)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                return cached
             
-            CONTENT:
-            {content[:6000]}  # Limit content to prevent token overflow
-            
-            Return the quiz as a JSON object with a 'questions' array.
-            """
+            # Select diverse chunks for quiz generation
+            selected_chunks = self._select_diverse_chunks(chunks, num_questions, chunk_embeddings)
             
-            response = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000
+            # One small request per batch of questions, issued concurrently
+            batches = self._split_into_batches(selected_chunks, num_questions)
+            results = self._run_batches_concurrently(
+                lambda batch_chunks, count: self._generate_quiz_batch(batch_chunks, count, difficulty),
+                batches
             )
             
-            # Parse quiz from response
-            quiz_data = self._parse_quiz_response(response.choices[0].message.content)
+            questions = [q for batch_questions in results for q in batch_questions]
+            valid_questions = [q for q in questions if q.get('options')]
+            quiz_data = {'questions': (valid_questions or questions)[:int(num_questions)]}
             
             # Add metadata
             quiz_data['metadata'] = {
@@ -313,6 +622,10 @@ class KenshoAIAssistant:
                 'source_chunks': [chunk['id'] for chunk in selected_chunks]
             }
             
+            # The parse fallback yields questions without options; don't cache those
+            if all(q.get('options') for q in quiz_data.get('questions', [])):
+                self._response_cache_put(cache_key, quiz_data)
+            
             return quiz_data
             
         except Exception as e:
@@ -332,9 +645,66 @@ class KenshoAIAssistant:
                 }
             }
     
+    def _generate_flashcard_batch(self, batch_chunks: List[Dict], num_cards: int) -> List[Dict]:
+        """Generate one batch of flashcards from a subset of chunks."""
+        content = "\n\n".join([chunk['text'] for chunk in batch_chunks])
+        
+        user_prompt = _FLASHCARD_USER_PROMPT.format(
+            num_cards=num_cards,
+            content=self._truncate_tokens(content, GENERATION_INPUT_TOKENS)
+        )
+        
+        response = self.client.chat.completions.create(
+            model=self.default_model,
+            messages=[
+                {"role": "system", "content": _FLASHCARD_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.4,
+            max_tokens=2000
+        )
+        
+        # Parse flashcards from response
+        flashcards = self._parse_flashcards_response(response.choices[0].message.content)
+        
+        # Add metadata to each flashcard (one timestamp for the whole batch)
+        created_at = datetime.now().isoformat()
+        source_chunks = [chunk['id'] for chunk in batch_chunks]
+        for card in flashcards:
+            card['created_at'] = created_at
+            card['source_chunks'] = list(source_chunks)
+        
+        return flashcards
+    
+    def _generate_quiz_batch(self, batch_chunks: List[Dict], num_questions: int,
+                             difficulty: str) -> List[Dict]:
+        """Generate one batch of quiz questions from a subset of chunks."""
+        content = "\n\n".join([chunk['text'] for chunk in batch_chunks])
+        
+        system_prompt = _QUIZ_SYSTEM_PROMPT.format(num_questions=num_questions, difficulty=difficulty)
+        
+        user_prompt = _QUIZ_USER_PROMPT.format(
+            num_questions=num_questions,
+            content=self._truncate_tokens(content, GENERATION_INPUT_TOKENS)
+        )
+        
+        response = self.client.chat.completions.create(
+            model=self.default_model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.3,
+            max_tokens=2000
+        )
+        
+        # Parse quiz from response
+        return self._parse_quiz_response(response.choices[0].message.content).get('questions', [])
+    
     def explain_concept(self, concept: str, context_chunks: List[Dict], 
                        explanation_style: str = "simple",
-                       chat_history: List[Dict] = None) -> Dict[str, Any]:
+                       chat_history: List[Dict] = None,
+                       session_id: str = None) -> Dict[str, Any]:
         """
         Explain a specific concept using document context and general knowledge.
 
@@ -343,14 +713,29 @@ class KenshoAIAssistant:
             context_chunks: Relevant chunks from vector search for context
             explanation_style: The style of explanation (e.g., "simple", "detailed", "analogy")
             chat_history: Previous messages in the conversation for context
+            session_id: Session the concept belongs to; enables the semantic response cache
 
         Returns:
             A dictionary with the explanation.
         """
         try:
-            context_text = self._prepare_context(context_chunks)
+            exact_key = None
+            if not chat_history:
+                exact_key = ("explain", concept, explanation_style, self._hash_chunks(context_chunks))
+                cached = self._response_cache_get(exact_key)
+                if cached is not None:
+                    return cached
+            
+            cache_key = (session_id, f"explain:{explanation_style}") if session_id and not chat_history else None
+            cached, concept_embedding = self._semantic_cache_lookup(cache_key, concept)
+            if cached:
+                return cached
 
-            system_prompt = self._get_rag_system_prompt() # Re-use the tutor persona
+            # Re-use the tutor persona; the document context goes into the stable prefix
+            system_prompt = self._build_context_system_prompt(
+                context_chunks,
+                "The user needs to understand a concept better. Use the document context as a primary source, but also draw on your general knowledge to provide a comprehensive and easy-to-understand explanation. If the context is sparse, rely more on your general knowledge but mention that the document has limited information."
+            )
 
             # Build conversation history for the model
             messages = []
@@ -360,16 +745,10 @@ class KenshoAIAssistant:
                     messages.append({"role": "assistant", "content": entry["ai_response"]})
 
             user_prompt = f"""
-            Relevant document context:
-            ---
-            {context_text}
-            ---
-            I need to understand a concept better.
-
             CONCEPT: {concept}
             EXPLANATION STYLE: {explanation_style}
 
-            Please explain this concept to me. Use the document context as a primary source, but also draw on your general knowledge to provide a comprehensive and easy-to-understand explanation. If the context is sparse, rely more on your general knowledge but mention that the document has limited information.
+            Please explain this concept to me.
             """
             messages.append({"role": "user", "content": user_prompt})
 
@@ -385,11 +764,16 @@ class KenshoAIAssistant:
 
             explanation = response.choices[0].message.content
 
-            return {
+            result = {
                 'explanation': explanation,
                 'style': explanation_style,
                 'timestamp': datetime.now().isoformat()
             }
+            self._semantic_cache_store(cache_key, concept_embedding, result)
+            if exact_key is not None:
+                self._response_cache_put(exact_key, result)
+            
+            return result
         except Exception as e:
             return {
                 'explanation': f"Sorry, I encountered an error while trying to explain '{concept}': {str(e)}",
@@ -398,92 +782,255 @@ class KenshoAIAssistant:
             }
 
 
+    def warm_up(self):
+        """Load the tokenizer and embedder and open the LLM connection pool ahead of the first request."""
+        self._truncate_tokens("warmup", 1)
+        try:
+            self._batch_embed(["warmup"])
+            if self.client:
+                self.client.models.list()
+        except Exception as e:
+            print(f"⚠️ Warm-up incomplete: {str(e)}")
+    
+    async def awarm_up(self):
+        """Open the async LLM connection pool once, from the event loop that will reuse it."""
+        if self._async_warmed or not self.async_client:
+            return
+        self._async_warmed = True
+        try:
+            await self.async_client.models.list()
+        except Exception as e:
+            print(f"⚠️ Async warm-up incomplete: {str(e)}")
+    
     # Helper methods
     
+    def _batch_embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in one batched forward pass; rows are unit-normalized."""
+        if self._embedder is None:
+            from .vector_store import get_embedding_model
+            self._embedder = get_embedding_model(EMBEDDING_MODEL)
+        return self._embedder.encode(
+            texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True, normalize_embeddings=True
+        )
+    
+    def _semantic_cache_lookup(self, cache_key: Optional[Tuple[str, str]], text: str,
+                               embedding: Optional[np.ndarray] = None) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+        """Return a cached result for a semantically similar query, plus the query embedding."""
+        if cache_key is None:
+            return None, None
+        
+        if embedding is None:
+            try:
+                embedding = self._batch_embed([text])[0]
+            except Exception as e:
+                print(f"⚠️ Semantic cache unavailable: {str(e)}")
+                return None, None
+        
+        with self._cache_lock:
+            entries = list(self._semantic_cache.get(cache_key, ()))
+        if entries:
+            scores = np.stack([vec for vec, _ in entries]) @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+                return dict(entries[best][1]), embedding
+        
+        return None, embedding
+    
+    def _semantic_cache_store(self, cache_key: Optional[Tuple[str, str]],
+                              embedding: Optional[np.ndarray], result: Dict):
+        """Remember a result under its query embedding, evicting the oldest entry when full."""
+        if cache_key is None or embedding is None:
+            return
+        
+        with self._cache_lock:
+            entries = self._semantic_cache.setdefault(cache_key, [])
+            entries.append((embedding, result))
+            if len(entries) > SEMANTIC_CACHE_MAX_ENTRIES:
+                entries.pop(0)
+    
+    def _build_answer_messages(self, question: str, context_chunks: List[Dict],
+                               chat_history: List[Dict] = None) -> List[Dict]:
+        """Build the chat messages for a RAG answer: system prompt, recent history, question."""
+        # Stable parts first (persona, instructions, document context) so repeated
+        # questions on the same document share a prompt prefix the provider can cache
+        messages = [{"role": "system", "content": self._build_context_system_prompt(
+            context_chunks,
+            "Based on the context and our conversation so far, please answer the user's question."
+        )}]
+        
+        # Build conversation history for the model
+        if chat_history:
+            for entry in chat_history[-5:]: # Use last 5 turns
+                messages.append({"role": "user", "content": entry["user_message"]})
+                messages.append({"role": "assistant", "content": entry["ai_response"]})
+
+        # Only the question varies between calls
+        messages.append({"role": "user", "content": f"QUESTION: {question}"})
+        
+        return messages
+    
+    def _build_context_system_prompt(self, context_chunks: List[Dict], instructions: str) -> str:
+        """Tutor system prompt followed by the document context block and task instructions."""
+        return f"""{self._get_rag_system_prompt()}
+Here is the relevant context from the document(s):
+---
+CONTEXT:
+{self._prepare_context(context_chunks)}
+---
+{instructions}
+"""
+    
+    def _build_answer_result(self, answer: str, context_chunks: List[Dict], question: str,
+                             confidence_future: Future = None) -> Dict[str, Any]:
+        """Attach sources, citations and confidence to a generated answer."""
+        if confidence_future is not None:
+            confidence = confidence_future.result()
+        else:
+            confidence = self._calculate_confidence(context_chunks, question)
+        
+        return {
+            'answer': answer,
+            'sources': self._extract_sources_from_chunks(context_chunks),
+            'citations': self._extract_citations_from_answer(answer),
+            'confidence': confidence,
+            'context_chunks_used': len(context_chunks),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _answer_error_result(self, error: Exception) -> Dict[str, Any]:
+        """Result returned by answer_question when generation fails."""
+        return {
+            'answer': f"Error generating answer: {str(error)}",
+            'sources': [],
+            'citations': [],
+            'confidence': 0.0,
+            'context_chunks_used': 0,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _split_into_batches(self, chunks: List[Dict], num_items: int) -> List[Tuple[List[Dict], int]]:
+        """Split a generation job into (chunks, item_count) batches of ITEMS_PER_REQUEST items."""
+        num_items = int(num_items)
+        num_batches = max(1, math.ceil(num_items / ITEMS_PER_REQUEST))
+        
+        batches = []
+        for b in range(num_batches):
+            # Interleave chunks so every batch draws from across the document
+            batch_chunks = chunks[b::num_batches] or chunks
+            count = num_items // num_batches + (1 if b < num_items % num_batches else 0)
+            batches.append((batch_chunks, count))
+        
+        return batches
+    
+    def _run_batches_concurrently(self, fn, batches: List[Tuple]) -> List[Any]:
+        """Run fn(*batch) for every batch in a thread pool, keeping the successful results in order."""
+        if len(batches) == 1:
+            return [fn(*batches[0])]
+        
+        results, errors = [], []
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(batches))) as executor:
+            futures = [executor.submit(fn, *batch) for batch in batches]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+        
+        if not results:
+            raise errors[0]
+        
+        return results
+    
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens tokens to prevent token overflow."""
+        if self._encoder is None:
+            try:
+                self._encoder = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except Exception as e:
+                # Tokenizer files unavailable (e.g. offline); approximate 4 chars per token
+                print(f"⚠️ Tokenizer unavailable, truncating by characters: {str(e)}")
+                self._encoder = False
+        
+        if not self._encoder:
+            return text[:max_tokens * 4]
+        
+        token_ids = self._encoder.encode(text, disallowed_special=())
+        if len(token_ids) <= max_tokens:
+            return text
+        return self._encoder.decode(token_ids[:max_tokens])
+    
+    def _hash_text(self, text: str) -> str:
+        """Short content digest used in exact-match cache keys."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    
+    def _hash_chunks(self, chunks: List[Dict]) -> str:
+        """Content digest of a chunk list, independent of how the list was built."""
+        digest = hashlib.blake2b(digest_size=8)
+        for chunk in chunks:
+            digest.update(chunk.get('text', '').encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def _response_cache_get(self, cache_key: Tuple) -> Any:
+        """Return a fresh copy of a cached result and mark it most recently used."""
+        with self._cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is None:
+                return None
+            self._response_cache.move_to_end(cache_key)
+        return orjson.loads(cached)
+    
+    def _response_cache_put(self, cache_key: Tuple, result: Any):
+        """Store a serialized result, evicting the least recently used entry when full."""
+        # Results are plain JSON data; an orjson round trip is a much cheaper copy than deepcopy
+        serialized = orjson.dumps(result)
+        with self._cache_lock:
+            self._response_cache[cache_key] = serialized
+            self._response_cache.move_to_end(cache_key)
+            if len(self._response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+                self._response_cache.popitem(last=False)
+    
     def _prepare_context(self, chunks: List[Dict]) -> str:
         """Prepare context string from chunks, including metadata."""
         if not chunks:
             return "No specific context from the document was found for this query."
-        context_parts = []
-        for chunk in chunks:
-            source_info = ""
-            if 'source_info' in chunk and chunk['source_info']:
-                if 'page' in chunk['source_info']:
-                    source_info = f"[source: page {chunk['source_info']['page']}]"
-                elif 'timestamp' in chunk['source_info']:
-                    source_info = f"[timestamp: {chunk['source_info']['timestamp']}]"
-            
-            context_parts.append(f"{source_info}\n{chunk['text']}")
         
-        return "\n\n".join(context_parts)
+        def format_chunk(chunk: Dict) -> str:
+            source_info = chunk.get('source_info') or {}
+            if 'page' in source_info:
+                return f"[source: page {source_info['page']}]\n{chunk['text']}"
+            if 'timestamp' in source_info:
+                return f"[timestamp: {source_info['timestamp']}]\n{chunk['text']}"
+            return f"\n{chunk['text']}"
+        
+        return "\n\n".join(format_chunk(chunk) for chunk in chunks)
     
     def _get_rag_system_prompt(self) -> str:
         """Get the system prompt for the AI tutor."""
-        return """
-        You are 'Kensho', a friendly and knowledgeable AI Tutor. Your goal is to help users understand their documents and learn new concepts.
-
-        Your personality:
-        - Patient, encouraging, and adaptive.
-        - You break down complex topics into simple, digestible pieces.
-        - You ask clarifying questions to check for understanding and guide the user's learning.
-        - You can be a bit informal and use emojis to make learning more engaging.
-
-        How you'll answer:
-        1.  **Use the Provided CONTEXT First**: Incorporate relevant excerpts from the documents the user uploaded to ground your answer, but you no longer need to insert explicit citation tags.
-        2.  **Bring in General Knowledge When Needed**: If the CONTEXT is sparse or the question goes beyond it, add helpful background from your broader knowledge. Preface these parts with phrases like "From my general knowledge..." so the learner knows the origin.
-        3.  **Stay Conversational**: Weave your replies into the ongoing chat, referencing earlier turns so the conversation feels continuous and natural.
-        4.  **Guide, Don't Just Answer**: Coach the learner. Break complex ideas into steps, ask clarifying questions, and suggest next learning actions.
-        5.  **Be Honest About Uncertainty**: If you're not sure, say so plainly and propose follow-up steps (e.g., "We could look this up with a web search tool").
-        """
+        return _RAG_SYSTEM_PROMPT
     
     def _get_summary_system_prompt(self, summary_type: str) -> str:
         """Get the system prompt for generating summaries."""
-        if summary_type == "comprehensive":
-            prompt = """
-            You are a meticulous academic assistant. Your task is to create a comprehensive, detailed summary of the provided text.
-            - Capture all main arguments, key evidence, and conclusions.
-            - Preserve the original nuance and tone.
-            - Organize the summary logically with clear paragraphs.
-            - Mention any important figures, data, or examples.
-            """
-        elif summary_type == "key_points":
-            prompt = """
-            You are a productivity expert. Your task is to extract the most critical key points from the text and present them as a concise bulleted list.
-            - Each bullet point should represent a single, core idea.
-            - Start each point with a strong action verb if possible.
-            - Focus on actionable insights, main findings, or critical definitions.
-            """
-        else:  # executive
-            prompt = """
-            You are a strategy consultant briefing a busy executive. Your task is to provide a short, high-level executive summary.
-            - Start with a one-sentence summary of the main outcome or conclusion.
-            - Briefly cover the core problem, methodology, and key findings.
-            - Focus on the "so what?" – the implications and strategic importance.
-            - Keep it concise and to the point.
-            """
-        return prompt
+        return _SUMMARY_SYSTEM_PROMPTS.get(summary_type, _SUMMARY_SYSTEM_PROMPTS["executive"])
     
     def _extract_sources_from_chunks(self, chunks: List[Dict]) -> List[Dict]:
         """Extract unique sources from a list of chunks."""
-        sources = []
+        unique_sources = {}
         for chunk in chunks:
+            key = (chunk.get('type', 'unknown'), chunk.get('source', 'unknown'))
+            if key in unique_sources:
+                continue
+            
             source = {
                 'chunk_id': chunk.get('id', 0),
-                'type': chunk.get('type', 'unknown'),
-                'source': chunk.get('source', 'unknown')
+                'type': key[0],
+                'source': key[1]
             }
             
-            if 'source_info' in chunk and chunk['source_info']:
+            if chunk.get('source_info'):
                 source.update(chunk['source_info'])
             
-            sources.append(source)
-        
-        # Remove duplicates
-        unique_sources = {}
-        for source in sources:
-            key = (source['type'], source['source'])
-            if key not in unique_sources:
-                unique_sources[key] = source
+            unique_sources[key] = source
         
         return list(unique_sources.values())
     
@@ -492,47 +1039,87 @@ class KenshoAIAssistant:
         citations = []
         
         # Look for page citations
-        page_citations = re.findall(r'\[source: page (\d+)\]', answer)
+        page_citations = _PAGE_CITE_RE.findall(answer)
         citations.extend([f"page {page}" for page in page_citations])
         
         # Look for timestamp citations
-        time_citations = re.findall(r'\[timestamp: (\d{2}:\d{2})\]', answer)
+        time_citations = _TIME_CITE_RE.findall(answer)
         citations.extend([f"timestamp {time}" for time in time_citations])
         
-        return list(set(citations))  # Remove duplicates
+        return list(dict.fromkeys(citations))  # Remove duplicates, keep order
     
     def _calculate_confidence(self, chunks: List[Dict], question: str) -> float:
         """Calculate confidence score based on context relevance."""
         if not chunks:
             return 0.0
         
-        # Simple confidence calculation based on similarity scores
-        similarity_scores = [chunk.get('similarity_score', 0.0) for chunk in chunks]
-        avg_similarity = sum(similarity_scores) / len(similarity_scores) if similarity_scores else 0.0
+        similarity_scores = np.fromiter(
+            (chunk.get('similarity_score', 0.0) for chunk in chunks), dtype=np.float32, count=len(chunks)
+        )
+        
+        if not all('similarity_score' in chunk for chunk in chunks):
+            # Chunks retrieved without scores: embed question and chunks in one batch
+            try:
+                embeddings = self._batch_embed([question] + [chunk.get('text', '') for chunk in chunks])
+                similarity_scores = (embeddings[1:] @ embeddings[0]).astype(np.float32, copy=False)
+            except Exception:
+                pass
         
         # Normalize to 0-1 range (assuming similarity scores are already normalized)
-        confidence = min(max(avg_similarity, 0.0), 1.0)
+        confidence = float(np.clip(similarity_scores.mean(), 0.0, 1.0))
         
         return round(confidence, 2)
     
-    def _select_diverse_chunks(self, chunks: List[Dict], num_items: int) -> List[Dict]:
-        """Select diverse chunks for content generation."""
+    def _select_diverse_chunks(self, chunks: List[Dict], num_items: int,
+                               chunk_embeddings: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Select diverse chunks for content generation.
+        
+        Uses chunk_embeddings when they match the chunks (the session index already holds them);
+        otherwise embeds a strided sample of at most SELECTION_MAX_CANDIDATES chunks.
+        """
         if len(chunks) <= num_items:
             return chunks
         
-        # Simple selection: take chunks with highest similarity scores
-        # and distribute them across the document
-        sorted_chunks = sorted(chunks, key=lambda x: x.get('similarity_score', 0.0), reverse=True)
+        num_items = int(num_items)
+        
+        if chunk_embeddings is None or len(chunk_embeddings) != len(chunks):
+            if len(chunks) > SELECTION_MAX_CANDIDATES:
+                chunks = chunks[::math.ceil(len(chunks) / SELECTION_MAX_CANDIDATES)]
+                if len(chunks) <= num_items:
+                    return chunks
+            try:
+                chunk_embeddings = self._batch_embed([chunk.get('text', '') for chunk in chunks])
+            except Exception:
+                # No embeddings available: take the chunks with the highest similarity scores
+                return heapq.nlargest(num_items, chunks, key=lambda x: x.get('similarity_score', 0.0))
         
-        # Take top chunks but try to distribute across different parts
-        selected = []
-        chunk_indices = [chunk.get('chunk_index', 0) for chunk in sorted_chunks]
+        if all('similarity_score' in chunk for chunk in chunks):
+            relevance = np.array([chunk['similarity_score'] for chunk in chunks], dtype=np.float32)
+        else:
+            # No query to compare against: relevance is closeness to the document's centroid
+            centroid = chunk_embeddings.mean(axis=0)
+            centroid /= np.linalg.norm(centroid) or 1.0
+            relevance = chunk_embeddings @ centroid
+        
+        selected = self._mmr(relevance, chunk_embeddings, num_items)
+        return [chunks[i] for i in selected]
+    
+    def _mmr(self, relevance: np.ndarray, chunk_embeddings: np.ndarray, k: int,
+             lam: float = MMR_LAMBDA) -> List[int]:
+        """Pick k indices by Maximal Marginal Relevance over unit-normalized embeddings."""
+        selected = [int(np.argmax(relevance))]
+        # Highest similarity of every candidate to anything already selected
+        max_sim_to_selected = chunk_embeddings @ chunk_embeddings[selected[0]]
         
-        for chunk in sorted_chunks:
-            if len(selected) < num_items:
-                selected.append(chunk)
+        while len(selected) < min(k, len(relevance)):
+            scores = lam * relevance - (1 - lam) * max_sim_to_selected
+            scores[selected] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(best)
+            max_sim_to_selected = np.maximum(max_sim_to_selected, chunk_embeddings @ chunk_embeddings[best])
         
-        return selected[:num_items]
+        return selected
     
     def _extract_key_topics(self, text: str) -> List[str]:
         """Extract key topics from text using simple keyword extraction."""
@@ -541,7 +1128,7 @@ class KenshoAIAssistant:
 
         try:
             system_prompt = "You are an expert at identifying key themes. Extract the main topics from the text below. Return a JSON list of strings."
-            user_prompt = f"TEXT: {text[:4000]}\n\nTOPICS:"
+            user_prompt = f"TEXT: {self._truncate_tokens(text, TOPICS_INPUT_TOKENS)}\n\nTOPICS:"
 
             response = self.client.chat.completions.create(
                 model=self.default_model,
@@ -555,26 +1142,43 @@ class KenshoAIAssistant:
             )
             
             # The response is expected to be a JSON object like {"topics": ["topic1", "topic2"]}
-            data = json.loads(response.choices[0].message.content)
+            data = orjson.loads(response.choices[0].message.content)
             return data.get("topics", [])
             
         except Exception:
             # Fallback for models that don't support JSON mode well or other errors
-            # Simple regex as a fallback
-            topics = re.findall(r'"(.*?)"', text)
-            return list(set(topics))[:5] # Return up to 5 unique topics
+            # Count candidate phrases in a single pass and keep the most frequent
+            counts = Counter(_QUOTED_PHRASE_RE.findall(text))
+            counts.update(m.group() for m in _TOPIC_RE.finditer(text))
+            return [topic for topic, _ in counts.most_common(5)] # Return up to 5 topics
 
+    def _slice_json_payload(self, text: str, open_char: str, close_char: str) -> Optional[str]:
+        """Return the span from the first open_char to the last close_char, if any."""
+        start = text.find(open_char)
+        end = text.rfind(close_char)
+        if start == -1 or end <= start:
+            return None
+        return text[start:end + 1]
+    
+    def _loads_lenient(self, payload: str) -> Any:
+        """Parse JSON with orjson, falling back to json5 for trailing commas, comments, etc."""
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            return json5.loads(payload)
+    
     def _parse_flashcards_response(self, response_text: str) -> List[Dict]:
         """Parse the AI's response to extract flashcards, resiliently."""
         try:
             # Try to parse as JSON
-            if response_text.strip().startswith('['):
-                return json.loads(response_text)
+            response_text = response_text.strip()
+            if response_text.startswith('['):
+                return self._loads_lenient(response_text)
             
             # Look for JSON array in the response
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            json_payload = self._slice_json_payload(response_text, '[', ']')
+            if json_payload:
+                return self._loads_lenient(json_payload)
             
             # Fallback: create a single error card
             return [{
@@ -597,13 +1201,21 @@ class KenshoAIAssistant:
         try:
             # The response should be a JSON object with a "questions" key
             # which is a list of question objects.
-            quiz_data = json.loads(response_text)
+            response_text = response_text.strip()
+            try:
+                quiz_data = self._loads_lenient(response_text)
+            except ValueError:
+                # Look for a JSON object wrapped in prose or code fences
+                json_payload = self._slice_json_payload(response_text, '{', '}')
+                if not json_payload:
+                    raise
+                quiz_data = self._loads_lenient(json_payload)
             if isinstance(quiz_data, dict) and "questions" in quiz_data:
                 return quiz_data
             else:
                 # Handle cases where the JSON is just the list itself
                 return {"questions": quiz_data}
-        except json.JSONDecodeError:
+        except ValueError:
             # Fallback for malformed JSON
             print("⚠️ Warning: Failed to decode JSON from quiz response. Using fallback.")
             return {"questions": [{"question": "Error parsing quiz data.", "options": [], "answer": ""}]} 
\ No newline at end of file
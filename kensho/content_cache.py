@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Kensho Content Cache Module
+Maps a hash of uploaded content to the session it already produced, so re-uploading the
+same PDF, text or video skips extraction, chunking and embedding entirely.
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, Optional
+
+import orjson
+
+# Bytes read per step when hashing uploaded files
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class ContentCache:
+    """Disk cache of `<hash>.meta.json` + `<hash>.txt` entries pointing at built sessions."""
+
+    def __init__(self, root_dir: str = os.path.join("sessions", ".content_cache"),
+                 sessions_dir: str = "sessions"):
+        self.root_dir = root_dir
+        self.sessions_dir = sessions_dir
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """BLAKE2b digest of a file's bytes, streamed so large PDFs are never read whole."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_text(*parts: str) -> str:
+        """BLAKE2b digest of one or more strings (e.g. pasted text, or a video id)."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode("utf-8", "ignore"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _paths(self, key: str):
+        return (os.path.join(self.root_dir, f"{key}.meta.json"),
+                os.path.join(self.root_dir, f"{key}.txt"))
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return {'session_id', 'chunk_count', 'full_text'} for a cached upload, or None.
+
+        An entry only counts as a hit while its session index is still on disk, so deleting
+        a session quietly invalidates it.
+        """
+        meta_path, text_path = self._paths(key)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = orjson.loads(f.read())
+
+            index_path = os.path.join(self.sessions_dir, meta["session_id"], "vector_index.faiss")
+            if not os.path.exists(index_path):
+                return None
+
+            with open(text_path, "r", encoding="utf-8") as f:
+                meta["full_text"] = f.read()
+            return meta
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, session_id: str, full_text: str, chunk_count: int):
+        """Record the session built from this content."""
+        meta_path, text_path = self._paths(key)
+        with self._lock:
+            # Text first: a meta file without its text would read as a broken hit
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(full_text)
+            with open(meta_path, "wb") as f:
+                f.write(orjson.dumps({"session_id": session_id, "chunk_count": chunk_count}))
+
+    def invalidate(self, key: str):
+        """Forget a cached upload."""
+        with self._lock:
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -7,17 +7,21 @@ Handles PDF, text, and YouTube video ingestion with clean parsing and metadata e
 import os
 import re
 import hashlib
+import logging
+import multiprocessing
+import subprocess
 import tempfile
-from typing import List, Dict, Any, Optional, Tuple, Generator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Generator, Callable
 from pathlib import Path
 import json
+import orjson
 
 # PDF and text processing
 import fitz  # PyMuPDF
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 # Audio processing
-from pydub import AudioSegment
 import yt_dlp
 
 # AI services
@@ -28,6 +32,49 @@ from tqdm import tqdm
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# PDFs with fewer pages than this are extracted in-process; a pool isn't worth its startup cost
+PARALLEL_PDF_MIN_PAGES = 8
+PDF_EXTRACT_MAX_WORKERS = 4
+
+# Share of a PDF upload's reported progress taken by page extraction; chunking follows
+PDF_EXTRACT_PROGRESS_SHARE = 0.8
+
+# Concurrent Groq transcription requests; kept low to respect API rate limits
+TRANSCRIBE_MAX_WORKERS = 4
+
+# Fraction of page height treated as running header / footer when extracting PDF text blocks
+PDF_HEADER_BAND = 0.05
+PDF_FOOTER_BAND = 0.07
+
+# Citation markers embedded in extracted text
+_MARKER_RE = re.compile(r'\[source: page \d+\]|\[timestamp: \d{2}:\d{2}(?::\d{2})?\]')
+
+
+def _body_text_from_blocks(blocks: List[Tuple], page_height: float) -> str:
+    """Join text blocks that sit inside the page body, dropping header/footer bands by geometry."""
+    top = page_height * PDF_HEADER_BAND
+    bottom = page_height * (1 - PDF_FOOTER_BAND)
+    
+    # Block tuples are (x0, y0, x1, y1, text, block_no, block_type); type 0 is text
+    return '\n'.join(
+        line
+        for block in blocks
+        if block[6] == 0 and block[1] > top and block[3] < bottom
+        for line in (raw.strip() for raw in block[4].split('\n'))
+        if line
+    )
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract and clean pages [start, end) of a PDF. Runs in a worker process."""
+    with fitz.open(pdf_path) as doc:
+        return [
+            (page_num, _body_text_from_blocks(doc[page_num].get_text("blocks"), doc[page_num].rect.height))
+            for page_num in range(start, end)
+        ]
+
 
 class DocumentProcessor:
     """Handles document ingestion, processing, and chunking for Kensho."""
@@ -56,35 +103,43 @@ class DocumentProcessor:
         )
         
         os.makedirs(sessions_dir, exist_ok=True)
-        print(f"💾 Sessions directory ready: {os.path.abspath(sessions_dir)}")
+        logger.info(f"💾 Sessions directory ready: {os.path.abspath(sessions_dir)}")
     
     def create_session_id(self, content: str) -> str:
         """Create a unique session ID based on content hash."""
-        return hashlib.md5(content.encode()).hexdigest()[:12]
+        # 6-byte BLAKE2b digest (12 hex chars), fed in 1 MiB slices so the whole
+        # document is never encoded into a single bytes copy
+        digest = hashlib.blake2b(digest_size=6)
+        step = 1 << 20
+        for start in range(0, len(content), step):
+            digest.update(content[start:start + step].encode('utf-8', 'ignore'))
+        return digest.hexdigest()
     
-    def process_pdf(self, pdf_path: str) -> Tuple[str, str, List[Dict]]:
+    def process_pdf(self, pdf_path: str,
+                    progress_callback: Optional[Callable[[float, str], None]] = None) -> Tuple[str, str, List[Dict]]:
         """
         Process PDF file and extract clean text with metadata.
         
+        progress_callback, if given, is called as (fraction_done, description) as extraction
+        finishes each page range and again when chunking starts.
+        
         Returns:
             Tuple of (session_id, full_text, chunks_with_metadata)
         """
         try:
-            print(f"📄 Starting PDF processing for: {pdf_path}")
+            logger.info(f"📄 Starting PDF processing for: {pdf_path}")
+            
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
+            logger.info(f"📄 PDF opened successfully. Pages: {page_count}")
             
-            doc = fitz.open(pdf_path)
-            print(f"📄 PDF opened successfully. Pages: {len(doc)}")
+            # Extract body text - header/footer blocks are dropped by their position on the page
+            cleaned_pages = self._extract_pdf_pages(pdf_path, page_count, progress_callback)
             
-            full_text = ""
+            text_parts: List[str] = []
             page_texts = []
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                
-                # Clean text - remove headers, footers, page numbers
-                cleaned_text = self._clean_pdf_text(text)
-                
+            for page_num, cleaned_text in cleaned_pages:
                 if cleaned_text.strip():
                     # Store per-page text without embedding explicit "[source]" tags.
                     page_texts.append({
@@ -92,32 +147,34 @@ class DocumentProcessor:
                         'text': cleaned_text
                     })
                     # Append the cleaned text directly to the full document text.
-                    full_text += f"\n{cleaned_text}\n"
+                    text_parts.append(f"\n{cleaned_text}\n")
                 
-                print(f"📄 Processed page {page_num + 1}/{len(doc)}")
+                logger.debug("📄 Processed page %d/%d", page_num + 1, page_count)
             
-            doc.close()
-            print(f"📄 Text extraction complete. Total length: {len(full_text)} characters, Pages with content: {len(page_texts)}")
+            full_text = "".join(text_parts)
+            logger.info(f"📄 Text extraction complete. Total length: {len(full_text)} characters, Pages with content: {len(page_texts)}")
             
             # Create temporary session ID for internal processing only
-            print(f"📄 Creating temporary session ID for processing...")
+            logger.debug("📄 Creating temporary session ID for processing...")
             temp_session_id = self.create_session_id(full_text)
-            print(f"📄 Temporary session ID created: {temp_session_id}")
+            logger.debug(f"📄 Temporary session ID created: {temp_session_id}")
             
             # Chunk the text
-            print(f"📄 Creating chunks...")
+            logger.debug("📄 Creating chunks...")
+            if progress_callback:
+                progress_callback(PDF_EXTRACT_PROGRESS_SHARE, "Chunking text")
             chunks = self._chunk_text_with_metadata(full_text, "pdf", pdf_path)
-            print(f"📄 Created {len(chunks)} chunks")
+            logger.info(f"📄 Created {len(chunks)} chunks")
             
             # Note: Don't save session data here as it will be handled by the API
             # The API will manage the session data using the correct session ID
             
-            print(f"✅ PDF processing complete: {temp_session_id}, {len(full_text)} chars, {len(chunks)} chunks")
+            logger.info(f"✅ PDF processing complete: {temp_session_id}, {len(full_text)} chars, {len(chunks)} chunks")
             return temp_session_id, full_text, chunks
             
         except Exception as e:
             error_msg = f"Error processing PDF: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             raise Exception(error_msg)
     
     def process_text(self, text: str, source_name: str = "text_input") -> Tuple[str, str, List[Dict]]:
@@ -131,12 +188,8 @@ class DocumentProcessor:
             # Create temporary session ID for internal processing only
             temp_session_id = self.create_session_id(text)
             
-            # Chunk the text
-            # Remove any leftover citation / timestamp markers so chunks contain only clean content.
-            cleaned_for_chunks = re.sub(r"\[source: page \d+\]", "", text)
-            cleaned_for_chunks = re.sub(r"\[timestamp: \d{2}:\d{2}(?::\d{2})?\]", "", cleaned_for_chunks)
-
-            chunks = self._chunk_text_with_metadata(cleaned_for_chunks, "text", source_name)
+            # Chunk the text (marker stripping happens inside, in a single pass)
+            chunks = self._chunk_text_with_metadata(text, "text", source_name)
             
             # Note: Don't save session data here as it will be handled by the API
             # The API will manage the session data using the correct session ID
@@ -154,9 +207,9 @@ class DocumentProcessor:
             Tuple of (progress_percentage, status_message, current_data)
         """
         try:
-            print(f"🎥 Starting YouTube processing for: {url}")
+            logger.info(f"🎥 Starting YouTube processing for: {url}")
             video_id = self._extract_video_id(url)
-            print(f"🎥 Extracted video ID: {video_id}")
+            logger.info(f"🎥 Extracted video ID: {video_id}")
             yield 5, "Extracting video information...", ""
             
             # Download audio
@@ -165,11 +218,11 @@ class DocumentProcessor:
             
             if not audio_file:
                 error_msg = "Failed to download video audio. This could be due to:\n1. Invalid YouTube URL\n2. Video is private or restricted\n3. Network connectivity issues\n4. Missing FFmpeg installation"
-                print(f"❌ {error_msg}")
+                logger.error(f"❌ {error_msg}")
                 yield 100, f"Error: {error_msg}", ""
                 return
             
-            print(f"✅ Audio downloaded successfully: {audio_file}")
+            logger.info(f"✅ Audio downloaded successfully: {audio_file}")
             
             # Transcribe with progress
             yield 20, "Starting transcription...", ""
@@ -184,7 +237,7 @@ class DocumentProcessor:
                 
                 if "Error" in partial_transcript:
                     transcription_error = True
-                    print(f"❌ Transcription error: {partial_transcript}")
+                    logger.error(f"❌ Transcription error: {partial_transcript}")
                     yield 100, f"Error: {partial_transcript}", ""
                     return
                 
@@ -192,11 +245,11 @@ class DocumentProcessor:
             
             if not transcript or len(transcript.strip()) < 10:
                 error_msg = "No transcript generated. The video might be silent or in a language not supported by the transcription service."
-                print(f"❌ {error_msg}")
+                logger.error(f"❌ {error_msg}")
                 yield 100, f"Error: {error_msg}", ""
                 return
             
-            print(f"✅ Transcription complete. Length: {len(transcript)} characters")
+            logger.info(f"✅ Transcription complete. Length: {len(transcript)} characters")
             
             # Process transcript
             yield 95, "Processing transcript...", transcript
@@ -204,7 +257,7 @@ class DocumentProcessor:
             # Create chunks without creating a new session ID
             chunks = self._chunk_text_with_metadata(transcript, "youtube", url)
             
-            print(f"✅ Created {len(chunks)} chunks from transcript")
+            logger.info(f"✅ Created {len(chunks)} chunks from transcript")
             
             # Note: Don't save session data here as it will be handled by the API
             # The API will manage the session data using the correct session ID
@@ -216,78 +269,66 @@ class DocumentProcessor:
             
         except Exception as e:
             error_msg = f"Error processing video: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             yield 100, f"Error: {error_msg}", ""
     
-    def _clean_pdf_text(self, text: str) -> str:
-        """Clean PDF text by removing headers, footers, and page numbers."""
-        lines = text.split('\n')
-        cleaned_lines = []
+    def _extract_pdf_pages(self, pdf_path: str, page_count: int,
+                           progress_callback: Optional[Callable[[float, str], None]] = None) -> List[Tuple[int, str]]:
+        """Extract cleaned text for every page, in page order, using a process pool for large PDFs."""
+        def report(pages_done: int):
+            if progress_callback:
+                progress_callback(PDF_EXTRACT_PROGRESS_SHARE * pages_done / max(page_count, 1),
+                                  f"Extracting PDF text ({pages_done}/{page_count} pages)")
         
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-            
-            # Skip likely headers/footers (very short lines at start/end)
-            if len(line) < 10:
-                continue
-            
-            # Skip page numbers
-            if re.match(r'^\d+$', line):
-                continue
-            
-            # Skip common header/footer patterns
-            if re.match(r'^(page|chapter|\d+/\d+)', line.lower()):
-                continue
-            
-            cleaned_lines.append(line)
+        if page_count < PARALLEL_PDF_MIN_PAGES:
+            pages = _extract_page_range(pdf_path, 0, page_count)
+            report(page_count)
+            return pages
+        
+        workers = min(os.cpu_count() or 1, PDF_EXTRACT_MAX_WORKERS)
         
-        return '\n'.join(cleaned_lines)
+        # One contiguous page range per worker so each process opens the PDF once
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        
+        try:
+            # Spawn fresh workers: forking a process that already runs the UI's event loop and
+            # thread pools can copy a held lock into the child and deadlock it
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                pages = []
+                # Ranges come back in order; report each as it completes
+                for page_range in executor.map(_extract_page_range, [pdf_path] * workers, bounds[:-1], bounds[1:]):
+                    pages.extend(page_range)
+                    report(len(pages))
+                return pages
+        except Exception as e:
+            logger.warning(f"⚠️ Parallel PDF extraction failed, falling back to sequential: {str(e)}")
+            pages = _extract_page_range(pdf_path, 0, page_count)
+            report(page_count)
+            return pages
     
     def _chunk_text_with_metadata(self, text: str, doc_type: str, source: str) -> List[Dict]:
         """Chunk text and add metadata for citations."""
         # Remove any leftover citation / timestamp markers so chunks contain only clean content.
-        cleaned_for_chunks = re.sub(r"\[source: page \d+\]", "", text)
-        cleaned_for_chunks = re.sub(r"\[timestamp: \d{2}:\d{2}(?::\d{2})?\]", "", cleaned_for_chunks)
+        cleaned_for_chunks = _MARKER_RE.sub("", text)
 
         chunks = self.text_splitter.split_text(cleaned_for_chunks)
         
-        chunks_with_metadata = []
-        for i, chunk in enumerate(chunks):
-            # Extract source information from chunk if available
-            source_info = self._extract_source_info(chunk)
-            
-            chunk_data = {
+        total_chunks = len(chunks)
+        
+        # Chunks stay plain dicts: the vector store, tools and API all consume them by key.
+        # Markers were stripped above, so no chunk can carry one; skip the per-chunk scan.
+        return [
+            {
                 'id': i,
                 'text': chunk,
                 'type': doc_type,
                 'source': source,
-                'source_info': source_info,
+                'source_info': {},
                 'chunk_index': i,
-                'total_chunks': len(chunks)
+                'total_chunks': total_chunks
             }
-            chunks_with_metadata.append(chunk_data)
-        
-        return chunks_with_metadata
-    
-    def _extract_source_info(self, chunk: str) -> Dict:
-        """Extract source information from chunk text."""
-        source_info = {}
-        
-        # Look for page references
-        page_match = re.search(r'\[source: page (\d+)\]', chunk)
-        if page_match:
-            source_info['page'] = int(page_match.group(1))
-        
-        # Look for timestamp references
-        time_match = re.search(r'\[timestamp: (\d{2}:\d{2})\]', chunk)
-        if time_match:
-            source_info['timestamp'] = time_match.group(1)
-        
-        return source_info
+            for i, chunk in enumerate(chunks)
+        ]
     
     def _extract_video_id(self, url: str) -> str:
         """Extract YouTube video ID from URL."""
@@ -310,7 +351,7 @@ class DocumentProcessor:
         """Download YouTube video audio."""
         try:
             video_url = f"https://www.youtube.com/watch?v={video_id}"
-            print(f"🎥 Downloading audio from: {video_url}")
+            logger.info(f"🎥 Downloading audio from: {video_url}")
             
             # Create temporary directory
             temp_dir = tempfile.mkdtemp()
@@ -318,7 +359,14 @@ class DocumentProcessor:
             
             # Try multiple audio extraction strategies
             ydl_opts_list = [
-                # First try: with ffmpeg post-processing
+                # First try: native audio stream as-is; Whisper decodes m4a/webm itself, so skip the transcode
+                {
+                    'format': 'bestaudio[ext=m4a]/bestaudio',
+                    'outtmpl': output_template,
+                    'quiet': True,
+                    'no_warnings': True
+                },
+                # Second try: with ffmpeg post-processing to mp3
                 {
                     'format': 'bestaudio[ext=m4a]/bestaudio/best',
                     'outtmpl': output_template,
@@ -330,13 +378,6 @@ class DocumentProcessor:
                     'quiet': True,
                     'no_warnings': True
                 },
-                # Second try: direct audio download without post-processing
-                {
-                    'format': 'bestaudio/best',
-                    'outtmpl': output_template,
-                    'quiet': True,
-                    'no_warnings': True
-                },
                 # Third try: any available format
                 {
                     'format': 'worst',
@@ -348,31 +389,31 @@ class DocumentProcessor:
             
             for i, ydl_opts in enumerate(ydl_opts_list):
                 try:
-                    print(f"🎥 Attempt {i+1}: Trying audio extraction strategy")
+                    logger.debug(f"🎥 Attempt {i+1}: Trying audio extraction strategy")
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         ydl.download([video_url])
                     
                     # Find any downloaded audio file
                     audio_extensions = ['.mp3', '.m4a', '.webm', '.ogg', '.wav']
-                    audio_files = []
-                    
-                    for ext in audio_extensions:
-                        files = [f for f in os.listdir(temp_dir) if f.endswith(ext)]
-                        audio_files.extend([os.path.join(temp_dir, f) for f in files])
+                    with os.scandir(temp_dir) as entries:
+                        audio_files = [e.path for e in entries
+                                       if e.is_file() and e.name.endswith(tuple(audio_extensions))]
+                    # Keep the extension preference order of the old per-extension scan
+                    audio_files.sort(key=lambda path: audio_extensions.index(os.path.splitext(path)[1]))
                     
                     if audio_files:
-                        print(f"✅ Successfully downloaded: {audio_files[0]}")
+                        logger.info(f"✅ Successfully downloaded: {audio_files[0]}")
                         return audio_files[0]
                         
                 except Exception as e:
-                    print(f"❌ Strategy {i+1} failed: {str(e)}")
+                    logger.warning(f"❌ Strategy {i+1} failed: {str(e)}")
                     continue
             
-            print(f"❌ All download strategies failed for video: {video_id}")
+            logger.error(f"❌ All download strategies failed for video: {video_id}")
             return None
             
         except Exception as e:
-            print(f"❌ Error downloading YouTube audio: {str(e)}")
+            logger.error(f"❌ Error downloading YouTube audio: {str(e)}")
             return None
     
     def _transcribe_with_progress(self, audio_file: str) -> Generator[Tuple[float, str], None, None]:
@@ -391,65 +432,91 @@ class DocumentProcessor:
             # Large file - split into chunks
             yield 10, "Splitting large audio file..."
             
-            audio = AudioSegment.from_file(audio_file)
-            bytes_per_ms = file_size / len(audio)
-            max_chunk_duration = int(max_chunk_size / bytes_per_ms)
-            
-            chunks = [audio[i:i+max_chunk_duration] 
-                     for i in range(0, len(audio), max_chunk_duration)]
-            
-            transcripts = []
-            
-            for i, chunk in enumerate(chunks):
-                progress = 10 + (i / len(chunks) * 80)
-                yield progress, f"Transcribing chunk {i+1}/{len(chunks)}..."
-                
-                # Export chunk to temporary file
-                with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_file:
-                    chunk_path = temp_file.name
-                
-                chunk.export(chunk_path, format="mp3")
-                
-                # Transcribe chunk
-                chunk_transcript = self._transcribe_with_groq(chunk_path)
-                transcripts.append(chunk_transcript)
+            with tempfile.TemporaryDirectory() as segment_dir, \
+                    ThreadPoolExecutor(max_workers=TRANSCRIBE_MAX_WORKERS) as executor:
+                # Each segment is uploaded as soon as ffmpeg closes it, overlapping cutting with transcription
+                futures = {}
+                for i, chunk_path in enumerate(
+                        self._iter_audio_segments(audio_file, file_size, max_chunk_size, segment_dir)):
+                    futures[executor.submit(self._transcribe_with_groq, chunk_path)] = i
+                    yield 15, f"Queued chunk {i+1} for transcription..."
                 
-                # Clean up
-                os.unlink(chunk_path)
-                
-                # Yield current combined transcript
-                current_transcript = " ".join(transcripts)
-                yield progress, current_transcript
+                transcripts = [None] * len(futures)
+                for done, future in enumerate(as_completed(futures), 1):
+                    chunk_transcript = future.result()
+                    if chunk_transcript.startswith("Error"):
+                        for pending in futures:
+                            pending.cancel()
+                        yield 100, chunk_transcript
+                        return
+                    
+                    transcripts[futures[future]] = chunk_transcript
+                    progress = 20 + (done / len(futures) * 70)
+                    yield progress, f"Transcribed chunk {done}/{len(futures)}..."
             
+            # Assemble in chunk order regardless of completion order
             final_transcript = " ".join(transcripts)
             yield 100, final_transcript
             
         except Exception as e:
             yield 100, f"Error transcribing audio: {str(e)}"
     
+    def _iter_audio_segments(self, audio_file: str, file_size: int, max_chunk_size: int,
+                             output_dir: str) -> Generator[str, None, None]:
+        """Cut audio into size-bounded segments with ffmpeg stream copy, yielding each path as it is finished."""
+        probe = subprocess.run(
+            ['ffprobe', '-v', '0', '-show_entries', 'format=duration', '-of', 'csv=p=0', audio_file],
+            capture_output=True, text=True, check=True
+        )
+        duration = float(probe.stdout.strip())
+        
+        # Leave headroom for VBR bitrate spikes so no segment exceeds the upload limit
+        segment_seconds = max(1, int(duration * max_chunk_size / file_size * 0.9))
+        extension = Path(audio_file).suffix or ".mp3"
+        
+        # ffmpeg writes each completed segment's name to the segment list on stdout
+        process = subprocess.Popen(
+            ['ffmpeg', '-v', 'error', '-i', audio_file, '-f', 'segment',
+             '-segment_time', str(segment_seconds), '-c', 'copy',
+             '-segment_list', 'pipe:1', '-segment_list_type', 'flat',
+             os.path.join(output_dir, f'chunk_%03d{extension}')],
+            stdout=subprocess.PIPE, text=True
+        )
+        try:
+            for line in process.stdout:
+                name = line.strip()
+                if name:
+                    yield os.path.join(output_dir, os.path.basename(name))
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg segmenting failed with exit code {returncode}")
+    
     def _transcribe_with_groq(self, audio_file: str) -> str:
         """Transcribe audio using Groq Whisper."""
         try:
-            print(f"🎤 Starting Groq transcription for: {audio_file}")
+            logger.info(f"🎤 Starting Groq transcription for: {audio_file}")
             file_size = os.path.getsize(audio_file)
-            print(f"🎤 Audio file size: {file_size / (1024*1024):.2f} MB")
+            logger.debug(f"🎤 Audio file size: {file_size / (1024*1024):.2f} MB")
             
             if file_size > 25 * 1024 * 1024:  # 25MB limit
                 return f"Error: Audio file too large ({file_size / (1024*1024):.2f} MB). Maximum size is 25MB."
             
             with open(audio_file, "rb") as file:
                 transcription = self.groq_client.audio.transcriptions.create(
-                    file=(os.path.basename(audio_file), file.read()),
+                    file=(os.path.basename(audio_file), file),
                     model="whisper-large-v3",
                 )
             
             result_text = transcription.text.strip()
-            print(f"✅ Transcription successful. Length: {len(result_text)} characters")
+            logger.info(f"✅ Transcription successful. Length: {len(result_text)} characters")
             return result_text
             
         except Exception as e:
             error_msg = f"Error transcribing with Groq: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             return error_msg
     
     def _save_session_data(self, session_id: str, data: Dict):
@@ -458,7 +525,7 @@ class DocumentProcessor:
         
         # Create session directory if it doesn't exist
         os.makedirs(session_dir, exist_ok=True)
-        print(f"💾 Created session directory: {session_dir}")
+        logger.debug(f"💾 Created session directory: {session_dir}")
         
         # Save metadata
         metadata_path = os.path.join(session_dir, "metadata.json")
@@ -470,19 +537,19 @@ class DocumentProcessor:
                 'created_at': str(Path().resolve()),
                 'chunk_count': len(data['chunks'])
             }, f, indent=2)
-        print(f"💾 Saved metadata to: {metadata_path}")
+        logger.debug(f"💾 Saved metadata to: {metadata_path}")
         
         # Save full text
         full_text_path = os.path.join(session_dir, "full_text.txt")
         with open(full_text_path, "w", encoding="utf-8") as f:
             f.write(data['full_text'])
-        print(f"💾 Saved full text to: {full_text_path}")
+        logger.debug(f"💾 Saved full text to: {full_text_path}")
         
         # Save chunks
         chunks_path = os.path.join(session_dir, "chunks.json")
-        with open(chunks_path, "w") as f:
-            json.dump(data['chunks'], f, indent=2)
-        print(f"💾 Saved {len(data['chunks'])} chunks to: {chunks_path}")
+        with open(chunks_path, "wb") as f:
+            f.write(orjson.dumps(data['chunks']))
+        logger.debug(f"💾 Saved {len(data['chunks'])} chunks to: {chunks_path}")
     
     def load_session(self, session_id: str) -> Optional[Dict]:
         """Load session data from files."""
@@ -501,8 +568,8 @@ class DocumentProcessor:
                 full_text = f.read()
             
             # Load chunks
-            with open(os.path.join(session_dir, "chunks.json"), "r") as f:
-                chunks = json.load(f)
+            with open(os.path.join(session_dir, "chunks.json"), "rb") as f:
+                chunks = orjson.loads(f.read())
             
             return {
                 'metadata': metadata,
@@ -511,7 +578,7 @@ class DocumentProcessor:
             }
             
         except Exception as e:
-            print(f"Error loading session {session_id}: {str(e)}")
+            logger.error(f"Error loading session {session_id}: {str(e)}")
             return None
     
     def list_sessions(self) -> List[Dict]:
@@ -521,16 +588,15 @@ class DocumentProcessor:
         if not os.path.exists(self.sessions_dir):
             return sessions
         
-        for session_id in os.listdir(self.sessions_dir):
-            session_path = os.path.join(self.sessions_dir, session_id)
-            if os.path.isdir(session_path):
-                metadata_path = os.path.join(session_path, "metadata.json")
-                if os.path.exists(metadata_path):
-                    try:
-                        with open(metadata_path, "r") as f:
-                            metadata = json.load(f)
-                        sessions.append(metadata)
-                    except:
-                        continue
+        with os.scandir(self.sessions_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                metadata_path = os.path.join(entry.path, "metadata.json")
+                try:
+                    with open(metadata_path, "r") as f:
+                        sessions.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
         
         return sorted(sessions, key=lambda x: x.get('created_at', ''), reverse=True) 
\ No newline at end of file
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Kensho Query Cache Module
+Thread-safe LRU + TTL cache for repeated chat questions within a session.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class QueryCache:
+    """In-memory LRU cache with per-entry expiry, keyed by (session_id, normalized query)."""
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(session_id: str, query: str) -> Tuple[str, str]:
+        """Key on a digest of the trimmed, lowercased query so trivial variations share an entry."""
+        digest = hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
+        return (session_id, digest)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_session(self, session_id: str):
+        """Drop every entry belonging to a session (e.g. after its documents change)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == session_id]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
@@ -1,11 +1,13 @@
 
 import os
-from typing import List, Dict
+import time
+from functools import lru_cache
+from typing import List, Dict, Tuple
 from langchain.tools import tool
 from langchain_community.tools import DuckDuckGoSearchRun
 from kensho.vector_store import KenshoVectorStore
 from kensho.ai_assistant import KenshoAIAssistant
-import json
+import orjson
 
 # Initialize components that the tools will use
 vector_store = KenshoVectorStore()
@@ -14,6 +16,50 @@ web_search_tool = DuckDuckGoSearchRun()
 # Initialize AI assistant
 ai_assistant = KenshoAIAssistant()
 
+# Seconds a positive session-directory check is trusted before re-checking the filesystem
+SESSION_DIR_TTL = 30.0
+_session_dir_checked: Dict[str, float] = {}
+
+
+def _session_dir_exists(session_dir: str) -> bool:
+    """os.path.isdir with a short TTL for hits; misses are always re-checked."""
+    now = time.monotonic()
+    checked_at = _session_dir_checked.get(session_dir)
+    if checked_at is not None and now - checked_at < SESSION_DIR_TTL:
+        return True
+    if os.path.isdir(session_dir):
+        _session_dir_checked[session_dir] = now
+        return True
+    _session_dir_checked.pop(session_dir, None)
+    return False
+
+
+@lru_cache(maxsize=32)
+def _parse_raw_chunks(chunks_path: str, mtime_ns: int) -> List[Dict]:
+    """Parse a raw chunk file; mtime is part of the key so edits invalidate the entry."""
+    with open(chunks_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+@lru_cache(maxsize=32)
+def _lowered_chunk_texts(chunks_path: str, mtime_ns: int) -> Tuple[str, ...]:
+    """Lowercased text of each parsed chunk, for keyword scans; kept apart from the chunk dicts."""
+    return tuple(chunk.get('text', '').lower() for chunk in _parse_raw_chunks(chunks_path, mtime_ns))
+
+
+def _load_raw_chunks(session_id: str) -> Tuple[List[Dict], Tuple[str, ...]]:
+    """
+    Load sessions/<id>/chunk_metadata.json and each chunk's lowercased text, re-parsing and
+    re-lowering only when the file changes.
+    """
+    chunks_path = os.path.join('sessions', session_id, 'chunk_metadata.json')
+    try:
+        mtime_ns = os.stat(chunks_path).st_mtime_ns
+    except OSError:
+        return [], ()
+    return _parse_raw_chunks(chunks_path, mtime_ns), _lowered_chunk_texts(chunks_path, mtime_ns)
+
+
 @tool
 def retrieve_session_docs(query: str, session_id: str) -> str:
     """
@@ -24,7 +70,7 @@ def retrieve_session_docs(query: str, session_id: str) -> str:
     print(f"🛠️  EXECUTING: retrieve_session_docs(query='{query}', session_id='{session_id}')")
     # All vector data lives under sessions/<id>/ (index, metadata). No *_vectors suffix needed to query.
     session_dir = os.path.join("sessions", session_id)
-    if not os.path.isdir(session_dir):
+    if not _session_dir_exists(session_dir):
         return "This session has no stored documents yet. Upload a PDF / text / YouTube transcript first."
 
     try:
@@ -32,29 +78,17 @@ def retrieve_session_docs(query: str, session_id: str) -> str:
         # Prefer the session_id param so KenshoVectorStore resolves paths internally.
         context_chunks = vector_store.search(query, session_id=session_id, top_k=5)
         # print(f"🔍 Semantic search results: {context_chunks}")
-        # 2️⃣  Keyword fallback – if semantic search finds nothing, scan all chunks for substrings
-        if not context_chunks:
-            all_chunks = vector_store.get_all_chunks(os.path.join(session_dir, "vector_index.faiss"))
-            lowered_query = query.lower()
-            keyword_hits = [c for c in all_chunks if lowered_query in c['text'].lower()]
-            # Sort hits by length proximity (shorter chunks first) to surface concise matches
-            keyword_hits = sorted(keyword_hits, key=lambda c: len(c['text']))[:5]
-            context_chunks = keyword_hits
-        # print(f"🔍 Keyword search results: {context_chunks}")
+        # 2️⃣  Keyword fallback – if semantic search finds nothing, scan all chunks for substrings.
+        # chunk_metadata.json holds the same chunks as the index, served from the mtime-keyed cache.
         if not context_chunks:
-            # Final fallback: maybe FAISS index hasn't been built yet. Try loading raw chunks file.
-            session_id = os.path.basename(session_dir).replace('_vectors', '')
-            chunks_path = os.path.join('sessions', session_id, 'chunk_metadata.json')
-            if os.path.exists(chunks_path):
-                try:
-                    with open(chunks_path, 'r') as f:
-                        raw_chunks = json.load(f)
-                    lowered_query = query.lower()
-                    raw_hits = [c for c in raw_chunks if lowered_query in c.get('text', '').lower()]
-                    raw_hits = sorted(raw_hits, key=lambda c: len(c.get('text', '')))[:5]
-                    context_chunks = raw_hits
-                except Exception as e:
-                    print(f"❌ Error loading raw chunks fallback: {e}")
+            try:
+                all_chunks, lowered_texts = _load_raw_chunks(session_id)
+                lowered_query = query.lower()
+                keyword_hits = [c for c, text in zip(all_chunks, lowered_texts) if lowered_query in text]
+                # Sort hits by length proximity (shorter chunks first) to surface concise matches
+                context_chunks = sorted(keyword_hits, key=lambda c: len(c.get('text', '')))[:5]
+            except Exception as e:
+                print(f"❌ Error loading raw chunks fallback: {e}")
 
         if not context_chunks:
             return "No relevant information found in the documents for this query."
@@ -92,7 +126,9 @@ def explain_concept(concept: str, session_id: str) -> str:
         # Retrieve relevant chunks for context (up to 5)
         context_chunks = vector_store.search(concept, session_id=session_id, top_k=5)
 
-        result = ai_assistant.explain_concept(concept, context_chunks or [], explanation_style="simple")
+        result = ai_assistant.explain_concept(
+            concept, context_chunks or [], explanation_style="simple", session_id=session_id
+        )
         return result.get('explanation', 'No explanation generated.')
     except Exception as e:
         print(f"❌ Error in explain_concept: {e}")
@@ -5,16 +5,155 @@ Beautiful, Zen-inspired Gradio interface for the AI learning assistant.
 """
 
 import os
+import asyncio
+import atexit
+import contextvars
+import hashlib
+import io
 import json
 import tempfile
+import threading
 import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import List, Dict, Any, Optional, Tuple
 import gradio as gr
+import jinja2
 import pandas as pd
+from fastapi.staticfiles import StaticFiles
+from starlette.routing import Mount
 
 from .document_processor import DocumentProcessor
 from .vector_store import KenshoVectorStore
-from .ai_assistant import KenshoAIAssistant
+from .ai_assistant import KenshoAIAssistant, EMBEDDING_MODEL
+from .query_cache import QueryCache
+from .content_cache import ContentCache
+
+# Event handlers Gradio may run at once; independent sessions proceed in parallel
+UI_CONCURRENCY_LIMIT = 8
+
+# Network-bound work (downloads, transcription polling) waits rather than computes
+IO_POOL_MAX_WORKERS = 32
+
+# Latest summary/flashcards/quiz kept in memory per (session, kind); older ones stay on disk
+ARTIFACT_CACHE_MAX_ENTRIES = 256
+
+@lru_cache(maxsize=None)
+def _section_header(title: str, color: str = "#6dd3ff", centered: bool = False) -> str:
+    """HTML for a panel heading in the Zen palette."""
+    align = " text-align: center;" if centered else ""
+    return f"<h3 style='color: {color};{align}'>{title}</h3>"
+
+
+def _insights(title: str, *lines: str, hint: str = "") -> Dict[str, Any]:
+    """Insight panel payload; only this small dict crosses the wire, the panel markup ships once."""
+    return {"title": title, "lines": list(lines), "hint": hint}
+
+
+# Static insight payloads, built once instead of per call
+_WELCOME_INSIGHTS = _insights(
+    "💡 Welcome to Kensho",
+    "Upload a document to begin your learning journey.",
+    "I'll guide you with insights and suggestions along the way."
+)
+
+_ERROR_INSIGHTS = _insights(
+    "⚠️ Something went wrong",
+    "Please check your input and try again.",
+    hint="Remember: Kensho learns from your content to guide you."
+)
+
+_READY_INSIGHTS = _insights(
+    "🌱 Ready to Begin",
+    "Upload a document to start your learning journey.",
+    hint="Kensho will adapt to your content and learning style."
+)
+
+# Patches the insight panel's text from a payload; no panel HTML is re-sent or re-rendered
+_INSIGHTS_JS = """
+(d) => {
+    if (!d) return;
+    document.getElementById('ki-title').textContent = d.title;
+    document.getElementById('ki-hint').textContent = d.hint;
+    document.getElementById('ki-lines').replaceChildren(...d.lines.map((line) => {
+        const p = document.createElement('p');
+        p.textContent = line;
+        return p;
+    }));
+}
+"""
+
+# Client-side flashcard deck controls. The whole deck ships once as JSON on #kensho-deck;
+# navigation, flipping and know/review marks only touch the DOM, never the server.
+_DECK_JS_TEMPLATE = """
+() => {
+    const deck = document.getElementById('kensho-deck');
+    if (!deck) return;
+    const cards = JSON.parse(deck.dataset.cards);
+    const status = JSON.parse(deck.dataset.status || '{}');
+    let index = parseInt(deck.dataset.index || '0', 10);
+    const back = deck.querySelector('.card-back');
+    const action = '%s';
+    if (action === 'flip') {
+        back.style.display = back.style.display === 'none' ? 'block' : 'none';
+        return;
+    }
+    if (action === 'known' || action === 'review') {
+        status[index] = action;
+        deck.dataset.status = JSON.stringify(status);
+    }
+    const step = action === 'prev' ? -1 : 1;
+    index = (index + step + cards.length) %% cards.length;
+    deck.dataset.index = index;
+    const card = cards[index];
+    deck.querySelector('.deck-question').textContent = card.question;
+    deck.querySelector('.deck-answer').textContent = card.answer;
+    deck.querySelector('.deck-meta').textContent =
+        `Difficulty: ${card.difficulty || 'N/A'} | Level: ${card.bloom_level || 'N/A'}`;
+    back.style.display = 'none';
+    const known = Object.values(status).filter((s) => s === 'known').length;
+    deck.querySelector('.deck-position').textContent =
+        `Card ${index + 1} of ${cards.length} · ${known} known`;
+}
+"""
+
+# Zen stylesheet, served as a static file the browser caches instead of being inlined into every page.
+# The URL carries a digest of the file, so a changed stylesheet gets a new URL and the cache can be immutable
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+STATIC_ROUTE = "kensho-static"
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+with open(os.path.join(STATIC_DIR, "kensho.css"), "rb") as _css_file:
+    _CSS_VERSION = hashlib.blake2b(_css_file.read(), digest_size=8).hexdigest()
+
+# Relative href, so the link still resolves when the app is served under a root path
+KENSHO_HEAD = f'<link rel="stylesheet" href="{STATIC_ROUTE}/kensho.css?v={_CSS_VERSION}">'
+
+
+class _ImmutableStaticFiles(StaticFiles):
+    """StaticFiles with a long-lived Cache-Control on successful responses."""
+    
+    async def get_response(self, path: str, scope) -> Any:
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = STATIC_CACHE_CONTROL
+        return response
+
+
+def static_routes() -> List[Mount]:
+    """Routes serving kensho/static; pass as launch(app_kwargs={"routes": static_routes()})."""
+    return [Mount(f"/{STATIC_ROUTE}", app=_ImmutableStaticFiles(directory=STATIC_DIR), name=STATIC_ROUTE)]
+
+# Flashcard, quiz and insight panel markup; templates are compiled once and autoescape model output
+_TEMPLATES = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+    autoescape=True
+)
+_FLASHCARD_TEMPLATE = _TEMPLATES.get_template("flashcard.html")
+_QUIZ_TEMPLATE = _TEMPLATES.get_template("quiz.html")
+# Insight panel shell, rendered once; _INSIGHTS_JS patches its text in place afterwards
+_INSIGHT_PANEL_TEMPLATE = _TEMPLATES.get_template("insight_panel.html")
 
 
 class KenshoUI:
@@ -26,158 +165,29 @@ class KenshoUI:
         self.ai_assistant = KenshoAIAssistant()
         self.current_session = None
         
-        # Custom CSS for Zen aesthetic
-        self.css = """
-        /* Kensho Zen Aesthetic */
-        :root {
-            --kensho-void: #0f0f1a;
-            --kensho-white: #ffffff;
-            --kensho-clarity: #6dd3ff;
-            --kensho-warmth: #ffaa88;
-            --kensho-subtle: #2a2a3a;
-        }
-        
-        .gradio-container {
-            background: linear-gradient(135deg, var(--kensho-void) 0%, #1a1a2e 100%);
-            color: var(--kensho-white);
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        }
-        
-        .kensho-header {
-            text-align: center;
-            padding: 2rem 0;
-            background: linear-gradient(45deg, var(--kensho-clarity), var(--kensho-warmth));
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            font-size: 2.5rem;
-            font-weight: 300;
-            letter-spacing: 0.1em;
-        }
-        
-        .kensho-tagline {
-            text-align: center;
-            color: var(--kensho-clarity);
-            font-size: 1.1rem;
-            margin-bottom: 2rem;
-            opacity: 0.8;
-        }
-        
-        .kensho-card {
-            background: rgba(42, 42, 58, 0.6);
-            border: 1px solid rgba(109, 211, 255, 0.2);
-            border-radius: 12px;
-            padding: 1.5rem;
-            margin: 1rem 0;
-            backdrop-filter: blur(10px);
-            transition: all 0.3s ease;
-        }
-        
-        .kensho-card:hover {
-            border-color: rgba(109, 211, 255, 0.5);
-            box-shadow: 0 8px 32px rgba(109, 211, 255, 0.1);
-        }
-        
-        .kensho-button {
-            background: linear-gradient(45deg, var(--kensho-clarity), var(--kensho-warmth));
-            border: none;
-            border-radius: 8px;
-            color: var(--kensho-void);
-            font-weight: 600;
-            padding: 0.75rem 1.5rem;
-            transition: all 0.3s ease;
-        }
-        
-        .kensho-button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 25px rgba(109, 211, 255, 0.3);
-        }
-        
-        .kensho-tab {
-            background: var(--kensho-subtle);
-            border-color: rgba(109, 211, 255, 0.3);
-            color: var(--kensho-white);
-        }
-        
-        .kensho-tab.selected {
-            background: var(--kensho-clarity);
-            color: var(--kensho-void);
-        }
-        
-        .kensho-chat-user {
-            background: linear-gradient(45deg, var(--kensho-clarity), rgba(109, 211, 255, 0.8));
-            color: var(--kensho-void);
-            border-radius: 18px 18px 4px 18px;
-            padding: 1rem;
-            margin: 0.5rem 0;
-            max-width: 80%;
-            margin-left: auto;
-        }
-        
-        .kensho-chat-assistant {
-            background: rgba(42, 42, 58, 0.8);
-            color: var(--kensho-white);
-            border: 1px solid rgba(109, 211, 255, 0.3);
-            border-radius: 18px 18px 18px 4px;
-            padding: 1rem;
-            margin: 0.5rem 0;
-            max-width: 80%;
-        }
-        
-        .kensho-flashcard {
-            background: var(--kensho-subtle);
-            border: 2px solid var(--kensho-clarity);
-            border-radius: 16px;
-            padding: 2rem;
-            text-align: center;
-            min-height: 200px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .kensho-flashcard:hover {
-            transform: rotateY(5deg);
-            box-shadow: 0 12px 40px rgba(109, 211, 255, 0.2);
-        }
-        
-        .kensho-progress {
-            background: var(--kensho-subtle);
-            border-radius: 10px;
-            overflow: hidden;
-            height: 8px;
-        }
-        
-        .kensho-progress-bar {
-            background: linear-gradient(90deg, var(--kensho-clarity), var(--kensho-warmth));
-            height: 100%;
-            transition: width 0.3s ease;
-        }
-        
-        .kensho-insight-panel {
-            background: rgba(255, 170, 136, 0.1);
-            border-left: 4px solid var(--kensho-warmth);
-            padding: 1rem;
-            margin: 1rem 0;
-            border-radius: 0 8px 8px 0;
-        }
-        
-        .kensho-citation {
-            background: rgba(109, 211, 255, 0.1);
-            color: var(--kensho-clarity);
-            padding: 0.2rem 0.5rem;
-            border-radius: 4px;
-            font-size: 0.9rem;
-            margin: 0 0.2rem;
-        }
-        """
+        # Repeat questions within a session skip retrieval and generation entirely
+        self.query_cache = QueryCache(max_size=2000, ttl_seconds=600)
+        
+        # Re-uploads of identical content reuse the session they already built
+        self.content_cache = ContentCache(
+            os.path.join(self.vector_store.sessions_dir, ".content_cache"),
+            sessions_dir=self.vector_store.sessions_dir
+        )
+        
+        # Most recent generated artifacts, so exports reuse what the user just produced
+        self._artifact_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._artifact_lock = threading.Lock()
+        
+        # Dedicated, long-lived pools: PDF parsing and embedding are CPU-bound and sized to
+        # the cores, downloads are IO-bound; neither competes with Gradio's own threadpool
+        self._cpu_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="kensho-cpu")
+        self._io_pool = ThreadPoolExecutor(max_workers=IO_POOL_MAX_WORKERS, thread_name_prefix="kensho-io")
+        atexit.register(self._shutdown_pools)
     
     def create_interface(self) -> gr.Blocks:
         """Create the main Gradio interface."""
         
-        with gr.Blocks(css=self.css, title="🌌 Kensho - AI Learning Mirror", theme=gr.themes.Soft()) as interface:
+        with gr.Blocks(head=KENSHO_HEAD, title="🌌 Kensho - AI Learning Mirror", theme=gr.themes.Soft()) as interface:
             
             # Header
             gr.HTML("""
@@ -196,7 +206,7 @@ class KenshoUI:
                 with gr.Column(scale=1):
                     # Left sidebar - Upload and Navigation
                     with gr.Group():
-                        gr.HTML("<h3 style='color: #6dd3ff; text-align: center;'>📁 Knowledge Ingestion</h3>")
+                        gr.HTML(_section_header("📁 Knowledge Ingestion", centered=True))
                         
                         # Upload options
                         with gr.Tabs():
@@ -238,7 +248,7 @@ class KenshoUI:
                                 )
                         
                         # Processing status
-                        processing_status = gr.HTML("")
+                        processing_status = gr.Markdown("")
                         processing_progress = gr.HTML("")
                 
                 with gr.Column(scale=3):
@@ -248,7 +258,7 @@ class KenshoUI:
                         # Summary Tab
                         with gr.Tab("📜 Summary", id="summary"):
                             with gr.Group():
-                                gr.HTML("<h3 style='color: #6dd3ff;'>📜 Document Summary</h3>")
+                                gr.HTML(_section_header("📜 Document Summary"))
                                 
                                 with gr.Row():
                                     summary_type = gr.Dropdown(
@@ -273,7 +283,7 @@ class KenshoUI:
                         # Chat Tab
                         with gr.Tab("💬 Chat", id="chat"):
                             with gr.Group():
-                                gr.HTML("<h3 style='color: #6dd3ff;'>💬 Ask Questions</h3>")
+                                gr.HTML(_section_header("💬 Ask Questions"))
                                 
                                 chatbot = gr.Chatbot(
                                     label="Kensho Assistant",
@@ -301,7 +311,7 @@ class KenshoUI:
                         # Flashcards Tab
                         with gr.Tab("🧩 Flashcards", id="flashcards"):
                             with gr.Group():
-                                gr.HTML("<h3 style='color: #6dd3ff;'>🧩 Study Flashcards</h3>")
+                                gr.HTML(_section_header("🧩 Study Flashcards"))
                                 
                                 with gr.Row():
                                     num_flashcards = gr.Slider(
@@ -344,7 +354,7 @@ class KenshoUI:
                         # Quiz Tab
                         with gr.Tab("📝 Quiz", id="quiz"):
                             with gr.Group():
-                                gr.HTML("<h3 style='color: #6dd3ff;'>📝 Test Your Knowledge</h3>")
+                                gr.HTML(_section_header("📝 Test Your Knowledge"))
                                 
                                 with gr.Row():
                                     num_questions = gr.Slider(
@@ -381,7 +391,7 @@ class KenshoUI:
                         # Export Tab
                         with gr.Tab("📁 Export", id="export"):
                             with gr.Group():
-                                gr.HTML("<h3 style='color: #6dd3ff;'>📁 Export Your Session</h3>")
+                                gr.HTML(_section_header("📁 Export Your Session"))
                                 
                                 export_options = gr.CheckboxGroup(
                                     choices=[
@@ -409,18 +419,11 @@ class KenshoUI:
                 with gr.Column(scale=1):
                     # Right sidebar - Assistant Insights
                     with gr.Group():
-                        gr.HTML("<h3 style='color: #ffaa88; text-align: center;'>🧘‍♂️ Insights</h3>")
+                        gr.HTML(_section_header("🧘‍♂️ Insights", color="#ffaa88", centered=True))
                         
-                        insights_panel = gr.HTML(
-                            """
-                            <div class="kensho-insight-panel">
-                                <p><strong>💡 Welcome to Kensho</strong></p>
-                                <p>Upload a document to begin your learning journey.</p>
-                                <p>I'll guide you with insights and suggestions along the way.</p>
-                            </div>
-                            """,
-                            elem_classes=["kensho-card"]
-                        )
+                        gr.HTML(_INSIGHT_PANEL_TEMPLATE.render(**_WELCOME_INSIGHTS), elem_classes=["kensho-card"])
+                        # Handlers write insight payloads here; _INSIGHTS_JS copies them into the panel
+                        insights_panel = gr.JSON(value=_WELCOME_INSIGHTS, visible=False)
                         
                         # Session info
                         session_info = gr.HTML("")
@@ -432,12 +435,95 @@ class KenshoUI:
                 session_state, summary_type, generate_summary_btn, summary_output,
                 chatbot, chat_input, chat_send_btn, num_flashcards, generate_flashcards_btn,
                 flashcard_display, flip_card_btn, prev_card_btn, next_card_btn,
+                know_it_btn, review_btn,
                 num_questions, quiz_difficulty, generate_quiz_btn, quiz_display,
                 export_options, export_btn, export_file, insights_panel, session_info
             )
         
+        # Run up to UI_CONCURRENCY_LIMIT handlers concurrently instead of one at a time
+        interface.queue(default_concurrency_limit=UI_CONCURRENCY_LIMIT, max_size=64)
+        
+        # Pay model-load and connection costs now rather than on the first user event
+        self._cpu_pool.submit(self.warm_up)
+        interface.load(self.ai_assistant.awarm_up, queue=False)
+        
         return interface
     
+    def warm_up(self):
+        """Run one embedding and search-path pass plus the assistant's warm-up, off the request path."""
+        self.vector_store.create_embeddings(["warmup"])
+        self.ai_assistant.warm_up()
+    
+    def _shutdown_pools(self):
+        """Stop the worker pools without waiting on in-flight uploads."""
+        self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _run_in_pool(self, pool: ThreadPoolExecutor, func, *args, **kwargs):
+        """Await a blocking call on one of our pools, keeping context vars (as asyncio.to_thread does)."""
+        call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return asyncio.get_running_loop().run_in_executor(pool, call)
+    
+    def _run_cpu(self, func, *args, **kwargs):
+        """Await a CPU-bound call on the dedicated CPU pool."""
+        return self._run_in_pool(self._cpu_pool, func, *args, **kwargs)
+    
+    def _run_io(self, func, *args, **kwargs):
+        """Await a blocking IO call on the dedicated IO pool."""
+        return self._run_in_pool(self._io_pool, func, *args, **kwargs)
+    
+    def _start_index_build(self, session_id: str, chunks: List[Dict], content_key: str, full_text: str):
+        """
+        Drop the session's stale cached answers and build its vector index in the background.
+        
+        The content cache only learns about the session once its index is built; searches and
+        chunk reads wait for the pending build on their own.
+        """
+        self.query_cache.invalidate_session(session_id)
+        future = self.vector_store.build_index_async(session_id, chunks)
+        future.add_done_callback(
+            lambda done: done.result() and self.content_cache.put(content_key, session_id, full_text, len(chunks))
+        )
+    
+    def _artifact_path(self, session_id: str, kind: str) -> str:
+        """On-disk location of a session's cached artifact."""
+        return os.path.join(self.vector_store.sessions_dir, session_id, "cache", f"{kind}.json")
+    
+    def _remember_artifact(self, session_id: str, kind: str, value: Any):
+        """Put an artifact in the in-memory LRU."""
+        with self._artifact_lock:
+            self._artifact_cache[(session_id, kind)] = value
+            self._artifact_cache.move_to_end((session_id, kind))
+            while len(self._artifact_cache) > ARTIFACT_CACHE_MAX_ENTRIES:
+                self._artifact_cache.popitem(last=False)
+    
+    def _get_artifact(self, session_id: str, kind: str) -> Optional[Any]:
+        """Latest generated artifact of a kind for a session: memory first, then its on-disk copy."""
+        with self._artifact_lock:
+            if (session_id, kind) in self._artifact_cache:
+                self._artifact_cache.move_to_end((session_id, kind))
+                return self._artifact_cache[(session_id, kind)]
+        
+        try:
+            with open(self._artifact_path(session_id, kind), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        self._remember_artifact(session_id, kind, value)
+        return value
+    
+    def _store_artifact(self, session_id: str, kind: str, value: Any):
+        """Keep an artifact in memory and write it through to sessions/<id>/cache/<kind>.json."""
+        self._remember_artifact(session_id, kind, value)
+        try:
+            path = self._artifact_path(session_id, kind)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+        except OSError as e:
+            print(f"⚠️ Could not persist {kind} for session {session_id}: {str(e)}")
+    
     def _setup_event_handlers(self, *components):
         """Setup all event handlers for the interface."""
         (pdf_file, pdf_upload_btn, text_input, text_upload_btn,
@@ -445,6 +531,7 @@ class KenshoUI:
          session_state, summary_type, generate_summary_btn, summary_output,
          chatbot, chat_input, chat_send_btn, num_flashcards, generate_flashcards_btn,
          flashcard_display, flip_card_btn, prev_card_btn, next_card_btn,
+         know_it_btn, review_btn,
          num_questions, quiz_difficulty, generate_quiz_btn, quiz_display,
          export_options, export_btn, export_file, insights_panel, session_info) = components
         
@@ -496,6 +583,15 @@ class KenshoUI:
             outputs=[flashcard_display, insights_panel]
         )
         
+        # Deck navigation runs entirely in the browser
+        insights_panel.change(fn=None, inputs=[insights_panel], js=_INSIGHTS_JS)
+        
+        prev_card_btn.click(fn=None, js=_DECK_JS_TEMPLATE % "prev")
+        next_card_btn.click(fn=None, js=_DECK_JS_TEMPLATE % "next")
+        flip_card_btn.click(fn=None, js=_DECK_JS_TEMPLATE % "flip")
+        know_it_btn.click(fn=None, js=_DECK_JS_TEMPLATE % "known")
+        review_btn.click(fn=None, js=_DECK_JS_TEMPLATE % "review")
+        
         # Quiz
         generate_quiz_btn.click(
             fn=self.generate_quiz,
@@ -512,26 +608,39 @@ class KenshoUI:
     
     # Processing methods
     
-    def process_pdf(self, pdf_file, session_state):
+    async def process_pdf(self, pdf_file, session_state, progress=gr.Progress()):
         """Process uploaded PDF file."""
         if not pdf_file:
             return session_state, "❌ Please upload a PDF file.", self._get_error_insights(), ""
         
         try:
-            session_id, full_text, chunks = self.doc_processor.process_pdf(pdf_file.name)
+            content_key = await self._run_io(self.content_cache.hash_file, pdf_file.name)
+            cached = self.content_cache.get(content_key)
             
-            # Build vector index
-            self.vector_store.build_index(session_id, chunks)
+            if cached:
+                session_id, full_text, chunk_count = cached['session_id'], cached['full_text'], cached['chunk_count']
+            else:
+                progress(0, desc="Extracting PDF text")
+                # Extraction reports each finished page range, then the chunking step
+                session_id, full_text, chunks = await self._run_cpu(
+                    self.doc_processor.process_pdf, pdf_file.name,
+                    progress_callback=lambda fraction, desc: progress(fraction, desc=desc)
+                )
+                chunk_count = len(chunks)
+                
+                # Index in the background; the session is usable for summaries right away
+                progress(0.95, desc=f"Indexing {chunk_count} chunks in the background")
+                self._start_index_build(session_id, chunks, content_key, full_text)
             
             session_data = {
                 'id': session_id,
                 'type': 'pdf',
                 'source': pdf_file.name,
-                'chunks': chunks,
+                'chunk_count': chunk_count,
                 'full_text': full_text
             }
             
-            status = f"✅ PDF processed successfully! Session ID: `{session_id}`"
+            status = f"✅ PDF processed successfully! Session ID: `{session_id}`{self._indexing_note(session_id)}"
             insights = self._get_success_insights(session_data)
             info = self._get_session_info(session_data)
             
@@ -541,26 +650,35 @@ class KenshoUI:
             error_msg = f"❌ Error processing PDF: {str(e)}"
             return session_state, error_msg, self._get_error_insights(), ""
     
-    def process_text(self, text_input, session_state):
+    async def process_text(self, text_input, session_state, progress=gr.Progress()):
         """Process text input."""
         if not text_input or not text_input.strip():
             return session_state, "❌ Please enter some text.", self._get_error_insights(), ""
         
         try:
-            session_id, full_text, chunks = self.doc_processor.process_text(text_input)
+            content_key = self.content_cache.hash_text("text", text_input)
+            cached = self.content_cache.get(content_key)
             
-            # Build vector index
-            self.vector_store.build_index(session_id, chunks)
+            if cached:
+                session_id, full_text, chunk_count = cached['session_id'], cached['full_text'], cached['chunk_count']
+            else:
+                progress(0, desc="Chunking text")
+                session_id, full_text, chunks = await self._run_cpu(self.doc_processor.process_text, text_input)
+                chunk_count = len(chunks)
+                
+                # Index in the background; the session is usable for summaries right away
+                progress(0.9, desc=f"Indexing {chunk_count} chunks in the background")
+                self._start_index_build(session_id, chunks, content_key, full_text)
             
             session_data = {
                 'id': session_id,
                 'type': 'text',
                 'source': 'text_input',
-                'chunks': chunks,
+                'chunk_count': chunk_count,
                 'full_text': full_text
             }
             
-            status = f"✅ Text processed successfully! Session ID: `{session_id}`"
+            status = f"✅ Text processed successfully! Session ID: `{session_id}`{self._indexing_note(session_id)}"
             insights = self._get_success_insights(session_data)
             info = self._get_session_info(session_data)
             
@@ -570,96 +688,163 @@ class KenshoUI:
             error_msg = f"❌ Error processing text: {str(e)}"
             return session_state, error_msg, self._get_error_insights(), ""
     
-    def process_youtube(self, youtube_url, session_state):
-        """Process YouTube video with progress updates."""
+    async def process_youtube(self, youtube_url, session_state):
+        """Process YouTube video, streaming real download/transcription progress."""
         if not youtube_url or not youtube_url.strip():
-            return session_state, "❌ Please enter a YouTube URL.", "", self._get_error_insights(), ""
+            yield session_state, "❌ Please enter a YouTube URL.", "", self._get_error_insights(), ""
+            return
         
         try:
-            # This would need to be implemented as a generator for real-time updates
-            # For now, we'll simulate the process
+            content_key = self.content_cache.hash_text("youtube", self.doc_processor._extract_video_id(youtube_url.strip()))
+            cached = self.content_cache.get(content_key)
+            if cached:
+                session_data = {
+                    'id': cached['session_id'],
+                    'type': 'youtube',
+                    'source': youtube_url,
+                    'chunk_count': cached['chunk_count'],
+                    'full_text': cached['full_text']
+                }
+                yield (session_data, f"✅ YouTube video processed! Session ID: `{session_data['id']}`",
+                       self._progress_html(100), self._get_success_insights(session_data),
+                       self._get_session_info(session_data))
+                return
+            
+            result = None
+            # Each download/transcription step blocks on the network, so advance the
+            # generator on the IO pool and stream its progress as it arrives
+            steps = self.doc_processor.process_youtube_video(youtube_url)
+            while (step := await self._run_io(next, steps, None)) is not None:
+                progress, status, data = step
+                if status.startswith("Error"):
+                    yield session_state, f"❌ {status}", "", self._get_error_insights(), ""
+                    return
+                
+                if progress >= 100 and isinstance(data, dict):
+                    result = data
+                    break
+                
+                yield session_state, f"🎥 {status}", self._progress_html(progress), gr.update(), gr.update()
+            
+            if not result:
+                yield session_state, "❌ Error processing YouTube video: no transcript produced.", "", self._get_error_insights(), ""
+                return
             
-            status = "🎥 Processing YouTube video..."
-            progress = '<div class="kensho-progress"><div class="kensho-progress-bar" style="width: 10%;"></div></div>'
+            transcript = result['transcript']
+            chunks = result['chunks']
+            session_id = self.doc_processor.create_session_id(transcript)
             
-            # In a real implementation, you'd use the generator from document_processor
-            # For now, we'll create a simple placeholder
+            # Index in the background; the session is usable for summaries right away
+            self._start_index_build(session_id, chunks, content_key, transcript)
             
             session_data = {
-                'id': 'youtube_demo',
+                'id': session_id,
                 'type': 'youtube',
                 'source': youtube_url,
-                'chunks': [],
-                'full_text': "YouTube processing would happen here..."
+                'chunk_count': len(chunks),
+                'full_text': transcript
             }
             
-            final_status = f"✅ YouTube video processed! Session ID: `youtube_demo`"
-            final_progress = '<div class="kensho-progress"><div class="kensho-progress-bar" style="width: 100%;"></div></div>'
+            final_status = f"✅ YouTube video processed! Session ID: `{session_id}`{self._indexing_note(session_id)}"
             insights = self._get_success_insights(session_data)
             info = self._get_session_info(session_data)
             
-            return session_data, final_status, final_progress, insights, info
+            yield session_data, final_status, self._progress_html(100), insights, info
             
         except Exception as e:
             error_msg = f"❌ Error processing YouTube video: {str(e)}"
-            return session_state, error_msg, "", self._get_error_insights(), ""
+            yield session_state, error_msg, "", self._get_error_insights(), ""
     
     def generate_summary(self, session_state, summary_type):
-        """Generate summary of the document."""
+        """Generate summary of the document, streaming the Markdown as it is written."""
         if not session_state:
-            return "❌ Please upload a document first.", self._get_error_insights()
+            yield "❌ Please upload a document first.", self._get_error_insights()
+            return
         
         try:
-            summary_result = self.ai_assistant.generate_summary(
+            summary_md = io.StringIO()
+            summary_md.write(f"## {summary_type.title()} Summary\n\n")
+            
+            summary_result = None
+            streamed = False
+            for event in self.ai_assistant.generate_summary_stream(
                 session_state['full_text'], 
                 summary_type=summary_type
-            )
-            
-            summary_md = f"""
-            ## {summary_type.title()} Summary
-            
-            {summary_result['summary']}
+            ):
+                if isinstance(event, dict):
+                    summary_result = event
+                else:
+                    streamed = True
+                    summary_md.write(event)
+                    yield summary_md.getvalue(), gr.update()
             
-            ---
+            # Failures arrive only as the final dict, with the error in its summary text
+            if not streamed:
+                summary_md.write(summary_result['summary'])
+            if summary_result['word_count']:
+                self._store_artifact(session_state['id'], "summary", summary_result)
             
-            **Key Topics:** {', '.join(summary_result['key_topics'][:5])}
+            summary_md.write("\n\n---\n\n")
+            summary_md.write(f"**Key Topics:** {', '.join(summary_result['key_topics'][:5])}\n\n")
+            summary_md.write(f"**Word Count:** {summary_result['word_count']} words\n")
             
-            **Word Count:** {summary_result['word_count']} words
-            """
-            
-            insights = f"""
-            <div class="kensho-insight-panel">
-                <p><strong>📝 Summary Generated</strong></p>
-                <p>Type: {summary_type.title()}</p>
-                <p>Key topics identified: {len(summary_result['key_topics'])}</p>
-                <p><em>Try asking specific questions about these topics!</em></p>
-            </div>
-            """
+            insights = _insights(
+                "📝 Summary Generated",
+                f"Type: {summary_type.title()}",
+                f"Key topics identified: {len(summary_result['key_topics'])}",
+                hint="Try asking specific questions about these topics!"
+            )
             
-            return summary_md, insights
+            yield summary_md.getvalue(), insights
             
         except Exception as e:
             error_msg = f"❌ Error generating summary: {str(e)}"
-            return error_msg, self._get_error_insights()
+            yield error_msg, self._get_error_insights()
     
-    def chat_response(self, message, chat_history, session_state):
-        """Handle chat interactions."""
+    async def chat_response(self, message, chat_history, session_state):
+        """Handle chat interactions, streaming the answer into the chatbot as it is generated."""
         if not session_state:
             error_response = "❌ Please upload a document first to start chatting."
             chat_history.append([message, error_response])
-            return chat_history, "", self._get_error_insights()
+            yield chat_history, "", self._get_error_insights()
+            return
         
         if not message or not message.strip():
-            return chat_history, "", self._get_current_insights(session_state)
+            yield chat_history, "", self._get_current_insights(session_state)
+            return
         
+        cache_key = QueryCache.make_key(session_state['id'], message)
+        cached = self.query_cache.get(cache_key)
+        if cached:
+            response_text, insights = cached
+            chat_history.append([message, response_text])
+            yield chat_history, "", insights
+            return
+        
+        response_started = False
         try:
             # Search for relevant chunks
-            relevant_chunks = self.vector_store.search(session_state['id'], message, top_k=5)
-            
-            # Generate response
-            response_data = self.ai_assistant.answer_question(
-                message, relevant_chunks, session_state
+            # Embed the question once; retrieval and the assistant's semantic cache both reuse it
+            query_embedding = await self._run_cpu(self.vector_store.embed_query, message)
+            relevant_chunks = await self._run_cpu(
+                self.vector_store.search, message, session_id=session_state['id'], top_k=5,
+                query_embedding=query_embedding
             )
+            if self.vector_store.embedding_model_name != EMBEDDING_MODEL:
+                query_embedding = None
+            
+            # Stream the response; the generator ends with the full result dict
+            chat_history.append([message, ""])
+            response_started = True
+            response_data = None
+            async for event in self.ai_assistant.aanswer_question_stream(
+                message, relevant_chunks, session_id=session_state['id'], query_embedding=query_embedding
+            ):
+                if isinstance(event, dict):
+                    response_data = event
+                else:
+                    chat_history[-1][1] += event
+                    yield chat_history, "", gr.update()
             
             # Format response with citations
             response_text = response_data['answer']
@@ -667,23 +852,28 @@ class KenshoUI:
                 citations_text = " | ".join([f"<span class='kensho-citation'>{cite}</span>" for cite in response_data['citations']])
                 response_text += f"\n\n**Sources:** {citations_text}"
             
-            chat_history.append([message, response_text])
+            chat_history[-1][1] = response_text
             
-            insights = f"""
-            <div class="kensho-insight-panel">
-                <p><strong>💬 Question Answered</strong></p>
-                <p>Confidence: {response_data['confidence']:.1%}</p>
-                <p>Sources used: {response_data['context_chunks_used']}</p>
-                <p><em>Want to explore deeper? Try asking "Why is this important?"</em></p>
-            </div>
-            """
+            insights = _insights(
+                "💬 Question Answered",
+                f"Confidence: {response_data['confidence']:.1%}",
+                f"Sources used: {response_data['context_chunks_used']}",
+                hint='Want to explore deeper? Try asking "Why is this important?"'
+            )
+            
+            # Errors are reported inside the answer text; don't pin them in the cache
+            if not response_data['answer'].startswith("Error generating answer"):
+                self.query_cache.put(cache_key, (response_text, insights))
             
-            return chat_history, "", insights
+            yield chat_history, "", insights
             
         except Exception as e:
             error_response = f"❌ Error generating response: {str(e)}"
-            chat_history.append([message, error_response])
-            return chat_history, "", self._get_error_insights()
+            if response_started:
+                chat_history[-1][1] = error_response
+            else:
+                chat_history.append([message, error_response])
+            yield chat_history, "", self._get_error_insights()
     
     def generate_flashcards(self, session_state, num_cards):
         """Generate flashcards for studying."""
@@ -692,36 +882,26 @@ class KenshoUI:
         
         try:
             flashcards = self.ai_assistant.generate_flashcards(
-                session_state['chunks'], 
-                num_cards=num_cards
+                self.vector_store.get_session_chunks(session_state['id']), 
+                num_cards=num_cards,
+                chunk_embeddings=self.vector_store.get_chunk_embeddings(session_state['id'])
             )
             
             if flashcards:
-                # Display first flashcard
-                first_card = flashcards[0]
-                card_html = f"""
-                <div class="kensho-flashcard" onclick="this.querySelector('.card-back').style.display = this.querySelector('.card-back').style.display === 'none' ? 'block' : 'none';">
-                    <div class="card-front">
-                        <h3>Question</h3>
-                        <p style="font-size: 1.1rem; margin: 1rem 0;">{first_card['question']}</p>
-                        <small>Click to reveal answer</small>
-                    </div>
-                    <div class="card-back" style="display: none;">
-                        <h3>Answer</h3>
-                        <p style="font-size: 1.1rem; margin: 1rem 0;">{first_card['answer']}</p>
-                        <small>Difficulty: {first_card.get('difficulty', 'N/A')} | Level: {first_card.get('bloom_level', 'N/A')}</small>
-                    </div>
-                </div>
-                """
+                self._store_artifact(session_state['id'], "flashcards", flashcards)
+                # Render the first card; the rest of the deck rides along as JSON for the client-side controls
+                deck_json = json.dumps([
+                    {key: card.get(key) for key in ('question', 'answer', 'difficulty', 'bloom_level')}
+                    for card in flashcards
+                ])
+                card_html = _FLASHCARD_TEMPLATE.render(card=flashcards[0], deck_json=deck_json, total=len(flashcards))
                 
-                insights = f"""
-                <div class="kensho-insight-panel">
-                    <p><strong>🧩 Flashcards Ready</strong></p>
-                    <p>Generated {len(flashcards)} cards</p>
-                    <p>Mix of cognitive levels for deep learning</p>
-                    <p><em>Use the flip and navigation buttons to study!</em></p>
-                </div>
-                """
+                insights = _insights(
+                    "🧩 Flashcards Ready",
+                    f"Generated {len(flashcards)} cards",
+                    "Mix of cognitive levels for deep learning",
+                    hint="Use the flip and navigation buttons to study!"
+                )
                 
                 return card_html, insights
             else:
@@ -738,47 +918,27 @@ class KenshoUI:
         
         try:
             quiz_data = self.ai_assistant.generate_quiz(
-                session_state['chunks'], 
+                self.vector_store.get_session_chunks(session_state['id']), 
                 num_questions=num_questions,
-                difficulty=difficulty
+                difficulty=difficulty,
+                chunk_embeddings=self.vector_store.get_chunk_embeddings(session_state['id'])
             )
             
             if quiz_data and 'questions' in quiz_data:
+                self._store_artifact(session_state['id'], "quiz", quiz_data)
                 # Display first question
-                first_q = quiz_data['questions'][0]
-                
-                quiz_html = f"""
-                <div class="kensho-card">
-                    <h3>Question 1 of {len(quiz_data['questions'])}</h3>
-                    <p style="font-size: 1.1rem; margin: 1rem 0;"><strong>{first_q['question']}</strong></p>
-                    
-                    <div style="margin: 1rem 0;">
-                        <div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(109, 211, 255, 0.1); border-radius: 6px; cursor: pointer;">
-                            A) {first_q['options'][0] if len(first_q['options']) > 0 else 'Option A'}
-                        </div>
-                        <div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(109, 211, 255, 0.1); border-radius: 6px; cursor: pointer;">
-                            B) {first_q['options'][1] if len(first_q['options']) > 1 else 'Option B'}
-                        </div>
-                        <div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(109, 211, 255, 0.1); border-radius: 6px; cursor: pointer;">
-                            C) {first_q['options'][2] if len(first_q['options']) > 2 else 'Option C'}
-                        </div>
-                        <div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(109, 211, 255, 0.1); border-radius: 6px; cursor: pointer;">
-                            D) {first_q['options'][3] if len(first_q['options']) > 3 else 'Option D'}
-                        </div>
-                    </div>
-                    
-                    <p><small>Difficulty: {first_q.get('difficulty', difficulty)}</small></p>
-                </div>
-                """
+                quiz_html = _QUIZ_TEMPLATE.render(
+                    question=quiz_data['questions'][0],
+                    total=len(quiz_data['questions']),
+                    difficulty=difficulty
+                )
                 
-                insights = f"""
-                <div class="kensho-insight-panel">
-                    <p><strong>📝 Quiz Ready</strong></p>
-                    <p>{len(quiz_data['questions'])} questions</p>
-                    <p>Difficulty: {difficulty}</p>
-                    <p><em>Take your time and think deeply about each answer!</em></p>
-                </div>
-                """
+                insights = _insights(
+                    "📝 Quiz Ready",
+                    f"{len(quiz_data['questions'])} questions",
+                    f"Difficulty: {difficulty}",
+                    hint="Take your time and think deeply about each answer!"
+                )
                 
                 return quiz_html, insights
             else:
@@ -794,50 +954,64 @@ class KenshoUI:
             return None, self._get_error_insights()
         
         try:
-            # Create temporary directory for export files
-            temp_dir = tempfile.mkdtemp()
-            files_to_zip = []
-            
             session_id = session_state['id']
             
-            # Export summary
-            if "Summary (.md)" in export_options:
-                summary_result = self.ai_assistant.generate_summary(session_state['full_text'])
-                summary_path = os.path.join(temp_dir, f"{session_id}_summary.md")
-                with open(summary_path, 'w', encoding='utf-8') as f:
-                    f.write(f"# Kensho Session Summary\n\n")
-                    f.write(f"**Session ID:** {session_id}\n")
-                    f.write(f"**Type:** {session_state['type']}\n")
-                    f.write(f"**Source:** {session_state['source']}\n\n")
-                    f.write(f"## Summary\n\n{summary_result['summary']}\n\n")
-                    f.write(f"## Key Topics\n\n")
-                    for topic in summary_result['key_topics']:
-                        f.write(f"- {topic}\n")
-                files_to_zip.append(summary_path)
-            
-            # Export flashcards
-            if "Flashcards (.csv)" in export_options:
-                flashcards = self.ai_assistant.generate_flashcards(session_state['chunks'])
-                csv_path = os.path.join(temp_dir, f"{session_id}_flashcards.csv")
-                
-                df = pd.DataFrame(flashcards)
-                df.to_csv(csv_path, index=False)
-                files_to_zip.append(csv_path)
-            
-            # Create zip file
-            zip_path = os.path.join(temp_dir, f"kensho_session_{session_id}.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for file_path in files_to_zip:
-                    zipf.write(file_path, os.path.basename(file_path))
-            
-            insights = f"""
-            <div class="kensho-insight-panel">
-                <p><strong>📦 Export Ready</strong></p>
-                <p>Session: {session_id}</p>
-                <p>Files: {len(files_to_zip)} items</p>
-                <p><em>Your learning journey is preserved!</em></p>
-            </div>
-            """
+            # Staged on disk on purpose: gr.File can only hand the browser a file path, so the
+            # streaming generator behind the API's /export doesn't apply here. Only the zip itself
+            # touches disk, and it lives with the session rather than leaking a temp dir per export;
+            # each export stages into its own unique file and is swapped in only when complete, so
+            # concurrent exports never share a half-written zip
+            export_dir = os.path.join(self.vector_store.sessions_dir, session_id, "exports")
+            os.makedirs(export_dir, exist_ok=True)
+            zip_path = os.path.join(export_dir, f"kensho_session_{session_id}.zip")
+            fd, staging_path = tempfile.mkstemp(dir=export_dir, suffix=".zip")
+            try:
+                with os.fdopen(fd, 'wb') as staging_file, \
+                        zipfile.ZipFile(staging_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=3) as zipf:
+                    # Export summary
+                    if "Summary (.md)" in export_options:
+                        summary_result = self._get_artifact(session_id, "summary")
+                        if summary_result is None:
+                            summary_result = self.ai_assistant.generate_summary(session_state['full_text'])
+                            if summary_result['word_count']:
+                                self._store_artifact(session_id, "summary", summary_result)
+                        summary_md = io.StringIO()
+                        summary_md.write("# Kensho Session Summary\n\n")
+                        summary_md.write(f"**Session ID:** {session_id}\n")
+                        summary_md.write(f"**Type:** {session_state['type']}\n")
+                        summary_md.write(f"**Source:** {session_state['source']}\n\n")
+                        summary_md.write(f"## Summary\n\n{summary_result['summary']}\n\n")
+                        summary_md.write("## Key Topics\n\n")
+                        for topic in summary_result['key_topics']:
+                            summary_md.write(f"- {topic}\n")
+                        zipf.writestr(f"{session_id}_summary.md", summary_md.getvalue())
+                    
+                    # Export flashcards
+                    if "Flashcards (.csv)" in export_options:
+                        flashcards = self._get_artifact(session_id, "flashcards")
+                        if flashcards is None:
+                            flashcards = self.ai_assistant.generate_flashcards(
+                                self.vector_store.get_session_chunks(session_id),
+                                chunk_embeddings=self.vector_store.get_chunk_embeddings(session_id)
+                            )
+                            if flashcards:
+                                self._store_artifact(session_id, "flashcards", flashcards)
+                        flashcards_csv = io.StringIO()
+                        pd.DataFrame(flashcards).to_csv(flashcards_csv, index=False, lineterminator='\n', chunksize=10000)
+                        zipf.writestr(f"{session_id}_flashcards.csv", flashcards_csv.getvalue())
+                    
+                    file_count = len(zipf.namelist())
+                os.replace(staging_path, zip_path)
+            finally:
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+            
+            insights = _insights(
+                "📦 Export Ready",
+                f"Session: {session_id}",
+                f"Files: {file_count} items",
+                hint="Your learning journey is preserved!"
+            )
             
             return zip_path, insights
             
@@ -847,46 +1021,40 @@ class KenshoUI:
     
     # Helper methods for UI insights
     
+    def _indexing_note(self, session_id):
+        """Status suffix while a session's index is still being built."""
+        if self.vector_store.index_build_status(session_id) == 'building':
+            return " · indexing for search in the background; questions will wait for it."
+        return ""
+    
+    def _progress_html(self, percent):
+        """Render the Zen progress bar at the given percentage."""
+        return f'<div class="kensho-progress"><div class="kensho-progress-bar" style="width: {percent:.0f}%;"></div></div>'
+    
     def _get_success_insights(self, session_data):
         """Get insights panel content for successful processing."""
-        return f"""
-        <div class="kensho-insight-panel">
-            <p><strong>✨ Document Processed</strong></p>
-            <p>Type: {session_data['type'].upper()}</p>
-            <p>Chunks: {len(session_data['chunks'])}</p>
-            <p><em>Ready to explore! Try generating a summary or asking questions.</em></p>
-        </div>
-        """
+        return _insights(
+            "✨ Document Processed",
+            f"Type: {session_data['type'].upper()}",
+            f"Chunks: {session_data['chunk_count']}",
+            hint="Ready to explore! Try generating a summary or asking questions."
+        )
     
     def _get_error_insights(self):
         """Get insights panel content for errors."""
-        return """
-        <div class="kensho-insight-panel">
-            <p><strong>⚠️ Something went wrong</strong></p>
-            <p>Please check your input and try again.</p>
-            <p><em>Remember: Kensho learns from your content to guide you.</em></p>
-        </div>
-        """
+        return _ERROR_INSIGHTS
     
     def _get_current_insights(self, session_state):
         """Get current insights based on session state."""
         if not session_state:
-            return """
-            <div class="kensho-insight-panel">
-                <p><strong>🌱 Ready to Begin</strong></p>
-                <p>Upload a document to start your learning journey.</p>
-                <p><em>Kensho will adapt to your content and learning style.</em></p>
-            </div>
-            """
+            return _READY_INSIGHTS
         
-        return f"""
-        <div class="kensho-insight-panel">
-            <p><strong>🧠 Session Active</strong></p>
-            <p>Document: {session_state['type']}</p>
-            <p>Ready for questions, summaries, or study materials.</p>
-            <p><em>What would you like to explore next?</em></p>
-        </div>
-        """
+        return _insights(
+            "🧠 Session Active",
+            f"Document: {session_state['type']}",
+            "Ready for questions, summaries, or study materials.",
+            hint="What would you like to explore next?"
+        )
     
     def _get_session_info(self, session_data):
         """Get session information display."""
@@ -895,13 +1063,17 @@ class KenshoUI:
             <h4 style="color: #6dd3ff;">📊 Session Info</h4>
             <p><strong>ID:</strong> {session_data['id']}</p>
             <p><strong>Type:</strong> {session_data['type'].upper()}</p>
-            <p><strong>Chunks:</strong> {len(session_data['chunks'])}</p>
+            <p><strong>Chunks:</strong> {session_data['chunk_count']}</p>
             <p><strong>Text Length:</strong> {len(session_data['full_text'])} chars</p>
         </div>
         """
 
 
 def create_kensho_app():
-    """Create and return the Kensho Gradio application."""
+    """
+    Create and return the Kensho Gradio application.
+    
+    Its stylesheet is linked, not inlined: launch it with app_kwargs={"routes": static_routes()}.
+    """
     kensho_ui = KenshoUI()
     return kensho_ui.create_interface() 
\ No newline at end of file
@@ -5,21 +5,103 @@ Handles embeddings, FAISS vector storage, and semantic retrieval for RAG.
 """
 
 import os
-import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+import orjson
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from pathlib import Path
 
 # Vector store and embeddings
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 
 # Alternative: Gemini embeddings
+import httpx
 from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Chunks per SentenceTransformer forward pass when indexing a session
+EMBEDDING_BATCH_SIZE = 128
+
+# Texts per Gemini embeddings request, and requests kept in flight at once
+GEMINI_EMBEDDING_BATCH_SIZE = 64
+GEMINI_EMBEDDING_MAX_WORKERS = 8
+# Output size of text-embedding-004
+GEMINI_EMBEDDING_DIM = 768
+
+# Index builds running in the background at once (each is mostly one embedding pass)
+INDEX_BUILD_MAX_WORKERS = 2
+
+# Distinct query strings whose embeddings each store keeps for repeat searches
+QUERY_EMBEDDING_CACHE_SIZE = 256
+
+# Files making up a session's index, listed in the manifest written after all of them
+INDEX_FILES = ["vector_index.faiss", "chunk_metadata.json", "embedding_info.json"]
+INDEX_MANIFEST = "MANIFEST"
+
+# Sessions whose stats are read at once when listing indexes
+SESSION_STATS_MAX_WORKERS = 16
+
+# Approximate HNSW search instead of exhaustive search; automatic from HNSW_MIN_CHUNKS,
+# or for every session with KENSHO_USE_HNSW=1
+USE_HNSW = os.getenv("KENSHO_USE_HNSW") == "1"
+HNSW_MIN_CHUNKS = 2000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+# From this many chunks the HNSW graph stores product-quantized codes
+HNSW_PQ_MIN_CHUNKS = 5000
+
+# One loaded model per name for the whole process, shared by every vector store and the assistant
+_EMBEDDERS: Dict[str, SentenceTransformer] = {}
+_EMBEDDERS_LOCK = threading.Lock()
+
+
+def get_embedding_model(model_name: str) -> SentenceTransformer:
+    """
+    Return the process-wide SentenceTransformer for a model, loading it on first use (FP16 on CUDA).
+    
+    The instance is shared read-only: callers only run encode(), which is safe from several threads.
+    """
+    # Loaded models are returned without taking the lock; only a first load serializes
+    model = _EMBEDDERS.get(model_name)
+    if model is not None:
+        return model
+    
+    with _EMBEDDERS_LOCK:
+        model = _EMBEDDERS.get(model_name)
+        if model is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = SentenceTransformer(model_name, device=device)
+            if device == "cuda":
+                model = model.half()
+            _EMBEDDERS[model_name] = model
+        return model
+
+
+def _atomic_write(path: str, writer: Callable[[str], None]):
+    """Have writer fill a temp file next to path, then swap it in with one os.replace."""
+    tmp_path = path + ".tmp"
+    try:
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """Atomically replace path's contents with data."""
+    def write(tmp_path: str):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    _atomic_write(path, write)
+
 
 class KenshoVectorStore:
     """FAISS-based vector store for Kensho with local persistence."""
@@ -28,48 +110,106 @@ class KenshoVectorStore:
         self.sessions_dir = sessions_dir
         self.embedding_model_name = embedding_model
         
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(embedding_model)
+        # Shared embedding model; further stores in this process reuse the loaded weights
+        self.embedding_model = get_embedding_model(embedding_model)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         
+        # Repeat questions reuse their embedding instead of running the model again
+        self.embed_query = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._embed_query)
+        
+        # Background index builds; readers of a session wait on its pending build
+        self._build_executor = ThreadPoolExecutor(max_workers=INDEX_BUILD_MAX_WORKERS, thread_name_prefix="kensho-index")
+        self._build_futures: Dict[str, Future] = {}
+        self._build_lock = threading.Lock()
+        
         # Alternative: Gemini embeddings
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if self.gemini_api_key:
+            # One keep-alive HTTP/2 pool: concurrent embedding batches multiplex over a single
+            # connection instead of each paying its own TCP+TLS handshake
+            self._http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=GEMINI_EMBEDDING_MAX_WORKERS,
+                                    max_connections=GEMINI_EMBEDDING_MAX_WORKERS * 2),
+                timeout=httpx.Timeout(30.0, connect=5.0)
+            )
             self.gemini_client = OpenAI(
                 api_key=self.gemini_api_key,
-                base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+                base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+                http_client=self._http_client
             )
         
         os.makedirs(sessions_dir, exist_ok=True)
     
     def create_embeddings(self, texts: List[str], use_gemini: bool = False) -> np.ndarray:
-        """Create embeddings for a list of texts."""
+        """Create unit-normalized float32 embeddings for a list of texts."""
+        return self._embed_texts(texts, use_gemini)[0]
+    
+    def _embed_texts(self, texts: List[str], use_gemini: bool = False) -> Tuple[np.ndarray, bool]:
+        """
+        Embed texts and report whether Gemini produced them (False after a fallback).
+        
+        A Gemini failure falls back to SentenceTransformer for all of the texts; the two models'
+        vectors differ in size and space, so they can never be mixed in one index.
+        """
         if use_gemini and self.gemini_api_key:
-            return self._create_gemini_embeddings(texts)
-        else:
-            return self._create_sentence_transformer_embeddings(texts)
+            try:
+                return self._create_gemini_embeddings(texts), True
+            except Exception as e:
+                print(f"Error creating Gemini embeddings: {str(e)}")
+        return self._create_sentence_transformer_embeddings(texts), False
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """
+        Unit-normalized float32 embedding of one query (SentenceTransformer model).
+        
+        Called through self.embed_query, which caches by query string; the array is read-only
+        because cached copies are shared between callers.
+        """
+        embedding = self._create_sentence_transformer_embeddings([query])[0]
+        embedding.flags.writeable = False
+        return embedding
     
     def _create_sentence_transformer_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Create embeddings using SentenceTransformer."""
-        embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
-        return embeddings
+        """Create embeddings using SentenceTransformer (float32 even when the model runs in FP16)."""
+        embeddings = self.embedding_model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
     
     def _create_gemini_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Create embeddings using Gemini API."""
-        try:
-            embeddings = []
-            for text in texts:
+        """Create embeddings using Gemini API, GEMINI_EMBEDDING_BATCH_SIZE texts per request."""
+        batches = [texts[start:start + GEMINI_EMBEDDING_BATCH_SIZE]
+                   for start in range(0, len(texts), GEMINI_EMBEDDING_BATCH_SIZE)]
+        
+        # One output matrix filled in place; no list of rows and no final copy
+        embeddings = np.empty((len(texts), GEMINI_EMBEDDING_DIM), dtype=np.float32)
+        with ThreadPoolExecutor(max_workers=GEMINI_EMBEDDING_MAX_WORKERS) as pool:
+            for batch_num, vectors in enumerate(pool.map(self._embed_gemini_batch, batches)):
+                start = batch_num * GEMINI_EMBEDDING_BATCH_SIZE
+                embeddings[start:start + len(vectors)] = vectors
+        
+        # Match the SentenceTransformer path: callers rely on unit vectors
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def _embed_gemini_batch(self, batch: List[str]) -> np.ndarray:
+        """Embed one batch in a single request, retrying it once before giving up."""
+        for attempt in range(2):
+            try:
                 response = self.gemini_client.embeddings.create(
                     model="text-embedding-004",
-                    input=text
+                    input=batch
                 )
-                embeddings.append(response.data[0].embedding)
-            
-            return np.array(embeddings)
-        except Exception as e:
-            print(f"Error creating Gemini embeddings: {str(e)}")
-            # Fallback to SentenceTransformer
-            return self._create_sentence_transformer_embeddings(texts)
+                return np.array([item.embedding for item in response.data], dtype=np.float32)
+            except Exception as e:
+                if attempt:
+                    raise
+                print(f"⚠️ Gemini embedding batch failed, retrying: {str(e)}")
     
     def build_index(self, session_id: str, chunks: List[Dict], use_gemini: bool = False) -> bool:
         """Build FAISS index for a session's chunks."""
@@ -77,41 +217,22 @@ class KenshoVectorStore:
             session_dir = os.path.join(self.sessions_dir, session_id)
             os.makedirs(session_dir, exist_ok=True)
             
-            # Extract texts from chunks
-            texts = [chunk['text'] for chunk in chunks]
+            # Extract texts from chunks; repeated text (running headers, disclaimers) is embedded once
+            unique_rows: Dict[str, int] = {}
+            rows = [unique_rows.setdefault(chunk['text'], len(unique_rows)) for chunk in chunks]
+            texts = list(unique_rows)
             
-            # Create embeddings
-            embeddings = self.create_embeddings(texts, use_gemini=use_gemini)
+            # Create embeddings in one call, so any Gemini fallback covers the whole corpus
+            embeddings, used_gemini = self._embed_texts(texts, use_gemini)
             
-            # Create FAISS index
-            index = faiss.IndexFlatIP(self.embedding_dim)  # Inner product for cosine similarity
+            # Scatter back to one row per chunk; already unit-normalized, so inner product is cosine similarity
+            embeddings = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32)[rows])
             
-            # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(embeddings)
+            # Create FAISS index and add embeddings
+            index = self._create_faiss_index(embeddings)
             
-            # Add embeddings to index
-            index.add(embeddings)
-            
-            # Save index
-            index_path = os.path.join(session_dir, "vector_index.faiss")
-            faiss.write_index(index, index_path)
-            
-            # Save chunk metadata
-            metadata_path = os.path.join(session_dir, "chunk_metadata.json")
-            with open(metadata_path, "w") as f:
-                json.dump(chunks, f, indent=2)
-            
-            # Save embedding info
-            embedding_info = {
-                'model': self.embedding_model_name if not use_gemini else "gemini-text-embedding-004",
-                'dimension': self.embedding_dim,
-                'chunk_count': len(chunks),
-                'use_gemini': use_gemini
-            }
-            
-            embedding_info_path = os.path.join(session_dir, "embedding_info.json")
-            with open(embedding_info_path, "w") as f:
-                json.dump(embedding_info, f, indent=2)
+            # Save index, chunk metadata and embedding info
+            self._save_index_files(session_dir, index, chunks, used_gemini)
             
             return True
             
@@ -119,9 +240,210 @@ class KenshoVectorStore:
             print(f"Error building index for session {session_id}: {str(e)}")
             return False
     
+    def build_index_async(self, session_id: str, chunks: List[Dict], use_gemini: bool = False) -> Future:
+        """
+        Start build_index in the background and return its Future (resolving to build_index's bool).
+        
+        A build already pending for the session is returned instead of starting a second one.
+        load_index and get_session_chunks wait for a pending build, so callers can return early.
+        """
+        with self._build_lock:
+            future = self._build_futures.get(session_id)
+            if future is None or future.done():
+                future = self._build_executor.submit(self.build_index, session_id, chunks, use_gemini)
+                self._build_futures[session_id] = future
+                future.add_done_callback(lambda done: self._forget_build(session_id, done))
+            return future
+    
+    def _forget_build(self, session_id: str, future: Future):
+        """Drop a finished build's Future, unless a newer build has replaced it."""
+        with self._build_lock:
+            if self._build_futures.get(session_id) is future:
+                del self._build_futures[session_id]
+    
+    def wait_for_index(self, session_id: str, timeout: Optional[float] = None) -> bool:
+        """Block until any pending background build for the session finishes; False if it failed."""
+        with self._build_lock:
+            future = self._build_futures.get(session_id)
+        return future is None or future.result(timeout=timeout)
+    
+    def index_build_status(self, session_id: str) -> str:
+        """'building' while a background build is pending, else 'ready' or 'missing' from disk."""
+        with self._build_lock:
+            future = self._build_futures.get(session_id)
+        if future is not None and not future.done():
+            return 'building'
+        index_path = os.path.join(self.sessions_dir, session_id, "vector_index.faiss")
+        return 'ready' if os.path.exists(index_path) else 'missing'
+    
+    def update_index(self, session_id: str, new_chunks: List[Dict],
+                     removed_ids: Optional[List[int]] = None) -> bool:
+        """
+        Add and remove chunks in an existing session index, embedding only the new chunks.
+        
+        removed_ids are positions in the session's current chunk list; new chunks are appended, and
+        every chunk's 'id' is renumbered to its new position (== its vector id). Indexes that can't
+        be edited in place (HNSW graphs, indexes built before vector ids were attached, or sessions
+        growing past HNSW_MIN_CHUNKS) are rebuilt from the resulting chunks.
+        """
+        try:
+            session_dir = os.path.join(self.sessions_dir, session_id)
+            with open(os.path.join(session_dir, "embedding_info.json"), "rb") as f:
+                use_gemini = orjson.loads(f.read()).get('use_gemini', False)
+            
+            removed = sorted(set(removed_ids or []))
+            removed_set = set(removed)
+            kept = [chunk for position, chunk in enumerate(self.get_session_chunks(session_id))
+                    if position not in removed_set]
+            chunks = [{**chunk, 'id': position} for position, chunk in enumerate(kept + list(new_chunks))]
+            
+            # Read writable (never mapped): the index is edited in place
+            index = faiss.read_index(os.path.join(session_dir, "vector_index.faiss"))
+            if (not isinstance(index, faiss.IndexIDMap2) or self._index_type(index).startswith('IndexHNSW')
+                    or USE_HNSW or len(chunks) >= HNSW_MIN_CHUNKS):
+                return self.build_index(session_id, chunks, use_gemini=use_gemini)
+            
+            if removed:
+                index.remove_ids(np.array(removed, dtype=np.int64))
+                # Removal keeps storage order; renumber survivors so ids stay chunk positions
+                faiss.copy_array_to_vector(np.arange(index.ntotal, dtype=np.int64), index.id_map)
+                index.construct_rev_map()
+            
+            if new_chunks:
+                embeddings, used_gemini = self._embed_texts([chunk['text'] for chunk in new_chunks], use_gemini)
+                if used_gemini != use_gemini:
+                    # New vectors fell back to another model; re-embed the session with one model
+                    return self.build_index(session_id, chunks, use_gemini=use_gemini)
+                index.add_with_ids(np.ascontiguousarray(embeddings, dtype=np.float32),
+                                   np.arange(index.ntotal, index.ntotal + len(new_chunks), dtype=np.int64))
+            
+            self._save_index_files(session_dir, index, chunks, use_gemini)
+            return True
+            
+        except Exception as e:
+            print(f"Error updating index for session {session_id}: {str(e)}")
+            return False
+    
+    def _save_index_files(self, session_dir: str, index: faiss.Index, chunks: List[Dict], use_gemini: bool):
+        """
+        Write a session's index, chunk metadata and embedding info.
+        
+        Each file is swapped in whole; the manifest goes first and comes back last, so a
+        crash mid-write leaves a session load_index refuses rather than a torn one.
+        """
+        manifest_path = os.path.join(session_dir, INDEX_MANIFEST)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        
+        index_path = os.path.join(session_dir, "vector_index.faiss")
+        _atomic_write(index_path, lambda tmp: faiss.write_index(index, tmp))
+        
+        metadata_path = os.path.join(session_dir, "chunk_metadata.json")
+        _atomic_write_bytes(metadata_path, orjson.dumps(chunks, option=orjson.OPT_SERIALIZE_NUMPY))
+        
+        index_type = self._index_type(index)
+        embedding_info = {
+            # use_gemini is the model that actually produced the vectors, after any fallback
+            'model': self.embedding_model_name if not use_gemini else "gemini-text-embedding-004",
+            'dimension': index.d,
+            'chunk_count': len(chunks),
+            'use_gemini': use_gemini,
+            'index_type': index_type,
+            # Stored vector precision: FP16 scalar quantization, or PQ codes for large HNSW graphs
+            'quantization': 'pq' if index_type == 'IndexHNSWPQ' else 'fp16',
+            # Searches only read the index, so load_index maps it instead of copying it into memory
+            'load_mode': 'mmap'
+        }
+        
+        embedding_info_path = os.path.join(session_dir, "embedding_info.json")
+        _atomic_write_bytes(embedding_info_path, orjson.dumps(embedding_info, option=orjson.OPT_INDENT_2))
+        
+        _atomic_write_bytes(manifest_path, orjson.dumps(INDEX_FILES))
+    
+    def _create_faiss_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Build the index for normalized embeddings: exhaustive search for small sessions, HNSW from
+        HNSW_MIN_CHUNKS chunks (or always, with KENSHO_USE_HNSW=1).
+        
+        Vectors are stored as FP16 (half the memory of float32); inner product gives cosine similarity.
+        Every index is wrapped in IndexIDMap2 with vector id == chunk position, so exhaustive
+        indexes can later be edited in place by update_index.
+        """
+        count, dim = embeddings.shape
+        
+        if not USE_HNSW and count < HNSW_MIN_CHUNKS:
+            flat = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+            flat.train(embeddings)  # no-op for FP16, but keeps is_trained consistent across builds
+            index = faiss.IndexIDMap2(flat)
+            index.add_with_ids(embeddings, np.arange(count, dtype=np.int64))
+            return index
+        
+        if count >= HNSW_PQ_MIN_CHUNKS:
+            # Large sessions store PQ codes instead of full vectors (L2 metric; ranks like cosine on unit vectors)
+            graph = faiss.IndexHNSWPQ(dim, dim // 8, HNSW_M)
+        else:
+            graph = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        graph.train(embeddings)
+        graph.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        
+        index = faiss.IndexIDMap2(graph)
+        index.add_with_ids(embeddings, np.arange(count, dtype=np.int64))
+        return index
+    
+    @staticmethod
+    def _index_type(index: faiss.Index) -> str:
+        """Name of the FAISS index class doing the search (looking through the id map)."""
+        if isinstance(index, faiss.IndexIDMap2):
+            index = faiss.downcast_index(index.index)
+        return type(index).__name__
+    
+    def get_session_chunks(self, session_id: str) -> List[Dict]:
+        """Load a session's chunk metadata without reading its FAISS index."""
+        metadata_path = os.path.join(self.sessions_dir, session_id, "chunk_metadata.json")
+        self.wait_for_index(session_id)
+        try:
+            with open(metadata_path, "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Error loading chunks for session {session_id}: {str(e)}")
+            return []
+    
+    def get_chunk_embeddings(self, session_id: str) -> Optional[np.ndarray]:
+        """
+        Unit-normalized vectors for a session's chunks, one row per chunk position, read back from
+        its index so callers need not embed the document again. None if the index can't supply them.
+        """
+        index_data = self.load_index(session_id)
+        if index_data is None:
+            return None
+        index, chunks, _ = index_data
+        
+        try:
+            if isinstance(index, faiss.IndexIDMap2):
+                # Rows come back in storage order; place each at its id (== chunk position)
+                stored = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+                ids = faiss.vector_to_array(index.id_map)
+                embeddings = np.empty_like(stored)
+                embeddings[ids] = stored
+            else:
+                embeddings = index.reconstruct_n(0, index.ntotal)
+        except RuntimeError as e:
+            print(f"Stored embeddings unavailable for session {session_id}: {str(e)}")
+            return None
+        
+        if len(embeddings) != len(chunks):
+            return None
+        
+        # FP16 and PQ storage only approximate the original unit vectors
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
     def load_index(self, session_id: str) -> Optional[Tuple[faiss.Index, List[Dict], Dict]]:
-        """Load FAISS index and metadata for a session."""
+        """Load FAISS index and metadata for a session, waiting for a pending background build."""
         try:
+            self.wait_for_index(session_id)
+            
             session_dir = os.path.join(self.sessions_dir, session_id)
             
             # Check if index exists
@@ -129,18 +451,23 @@ class KenshoVectorStore:
             if not os.path.exists(index_path):
                 return None
             
+            # Load embedding info
+            embedding_info_path = os.path.join(session_dir, "embedding_info.json")
+            with open(embedding_info_path, "rb") as f:
+                embedding_info = orjson.loads(f.read())
+            
+            # Sessions built with a manifest are only complete once it is written back
+            if embedding_info.get('load_mode') and not os.path.exists(os.path.join(session_dir, INDEX_MANIFEST)):
+                print(f"Index for session {session_id} is incomplete (interrupted build); skipping")
+                return None
+            
             # Load index
-            index = faiss.read_index(index_path)
+            index = self._read_index(index_path, embedding_info.get('load_mode') == 'mmap')
             
             # Load chunk metadata
             metadata_path = os.path.join(session_dir, "chunk_metadata.json")
-            with open(metadata_path, "r") as f:
-                chunks = json.load(f)
-            
-            # Load embedding info
-            embedding_info_path = os.path.join(session_dir, "embedding_info.json")
-            with open(embedding_info_path, "r") as f:
-                embedding_info = json.load(f)
+            with open(metadata_path, "rb") as f:
+                chunks = orjson.loads(f.read())
             
             return index, chunks, embedding_info
             
@@ -148,43 +475,93 @@ class KenshoVectorStore:
             print(f"Error loading index for session {session_id}: {str(e)}")
             return None
     
-    def search(self, query: str, vector_store_path: str = None, session_id: str = None, top_k: int = 5, use_gemini: bool = False) -> List[Dict]:
-        """Search for relevant chunks using semantic similarity."""
+    @staticmethod
+    def _read_index(index_path: str, mmap: bool) -> faiss.Index:
+        """
+        Read an index, memory-mapping its vectors read-only when asked, so the OS page cache backs
+        them and processes share one copy. FAISS builds that can't map this index type read it normally.
+        """
+        if mmap:
+            try:
+                return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                pass
+        return faiss.read_index(index_path)
+    
+    def search(self, query: str, vector_store_path: str = None, session_id: str = None, top_k: int = 5,
+               use_gemini: bool = False, query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Search for relevant chunks using semantic similarity.
+        
+        Pass query_embedding when the caller already embedded the query with this store's model
+        (via embed_query or create_embeddings, so it is unit-normalized).
+        """
+        # Handle both parameter styles
+        if vector_store_path and not session_id:
+            session_id = os.path.basename(vector_store_path).replace('_vectors', '')
+        
+        query_embeddings = None if query_embedding is None else np.atleast_2d(query_embedding)
+        return self.batch_search(session_id, [query], top_k=top_k, use_gemini=use_gemini,
+                                 query_embeddings=query_embeddings)[0]
+    
+    def batch_search(self, session_id: str, queries: List[str], top_k: int = 5, use_gemini: bool = False,
+                     query_embeddings: Optional[np.ndarray] = None) -> List[List[Dict]]:
+        """Search several queries at once: one embedding batch and one FAISS query for all of them."""
         try:
-            # Handle both parameter styles
-            if vector_store_path and not session_id:
-                session_id = os.path.basename(vector_store_path).replace('_vectors', '')
+            if not queries:
+                return []
             
             # Load index
             index_data = self.load_index(session_id)
             if not index_data:
-                return []
+                return [[] for _ in queries]
             
             index, chunks, embedding_info = index_data
             
-            # Create query embedding
-            query_embedding = self.create_embeddings([query], use_gemini=use_gemini)
-            
-            # Normalize query embedding
-            faiss.normalize_L2(query_embedding)
-            
-            # Search
-            scores, indices = index.search(query_embedding, top_k)
-            
-            # Prepare results
-            results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx < len(chunks):  # Ensure valid index
-                    chunk = chunks[idx].copy()
-                    chunk['similarity_score'] = float(score)
-                    chunk['rank'] = i + 1
-                    results.append(chunk)
-            
-            return results
+            # Nothing to rank: skip embedding the queries and the FAISS call entirely
+            if index.ntotal == 0 or top_k <= 0:
+                return [[] for _ in queries]
+            # Asking for more hits than vectors only makes FAISS pad with -1; ask for what exists
+            top_k = min(top_k, index.ntotal)
+            
+            # Create query embeddings as a single (N, d) matrix, unless the caller supplied them
+            if query_embeddings is None:
+                if len(queries) == 1 and not (use_gemini and self.gemini_api_key):
+                    query_embeddings = self.embed_query(queries[0])[None]
+                else:
+                    query_embeddings = self.create_embeddings(queries, use_gemini=use_gemini)
+            # Embeddings are already unit-normalized; FAISS only needs contiguous float32
+            query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+            
+            # Search; HNSW graphs explore a wider candidate list than top_k for recall, unless
+            # top_k already covers every vector (indexes saved before 'index_type' was recorded
+            # are inspected instead)
+            index_type = embedding_info.get('index_type') or self._index_type(index)
+            if index_type.startswith('IndexHNSW') and top_k < index.ntotal:
+                faiss.downcast_index(index.index).hnsw.efSearch = max(top_k * 4, HNSW_EF_SEARCH)
+            scores, indices = index.search(query_embeddings, top_k)
+            
+            # Report cosine similarity regardless of metric: for unit vectors, cos = 1 - d²/2
+            if index.metric_type == faiss.METRIC_L2:
+                scores = 1.0 - scores / 2.0
+            
+            # Prepare results; FAISS pads with -1 when top_k exceeds the index size
+            all_results = []
+            for query_scores, query_indices in zip(scores, indices):
+                results = []
+                for score, idx in zip(query_scores, query_indices):
+                    if 0 <= idx < len(chunks):
+                        chunk = chunks[idx].copy()
+                        chunk['similarity_score'] = float(score)
+                        chunk['rank'] = len(results) + 1
+                        results.append(chunk)
+                all_results.append(results)
+            
+            return all_results
             
         except Exception as e:
             print(f"Error searching in session {session_id}: {str(e)}")
-            return []
+            return [[] for _ in queries]
     
     def get_session_stats(self, session_id: str) -> Optional[Dict]:
         """Get statistics for a session's vector store."""
@@ -196,8 +573,8 @@ class KenshoVectorStore:
             if not os.path.exists(embedding_info_path):
                 return None
             
-            with open(embedding_info_path, "r") as f:
-                embedding_info = json.load(f)
+            with open(embedding_info_path, "rb") as f:
+                embedding_info = orjson.loads(f.read())
             
             # Check if index exists
             index_path = os.path.join(session_dir, "vector_index.faiss")
@@ -209,7 +586,9 @@ class KenshoVectorStore:
                 'embedding_model': embedding_info.get('model', 'unknown'),
                 'embedding_dimension': embedding_info.get('dimension', 0),
                 'chunk_count': embedding_info.get('chunk_count', 0),
-                'use_gemini': embedding_info.get('use_gemini', False)
+                'use_gemini': embedding_info.get('use_gemini', False),
+                'index_type': embedding_info.get('index_type', 'IndexFlatIP'),
+                'quantization': embedding_info.get('quantization', 'none')
             }
             
             if index_exists:
@@ -228,11 +607,7 @@ class KenshoVectorStore:
         try:
             session_dir = os.path.join(self.sessions_dir, session_id)
             
-            files_to_delete = [
-                "vector_index.faiss",
-                "chunk_metadata.json",
-                "embedding_info.json"
-            ]
+            files_to_delete = [INDEX_MANIFEST] + INDEX_FILES
             
             deleted_count = 0
             for filename in files_to_delete:
@@ -257,8 +632,8 @@ class KenshoVectorStore:
             if not os.path.exists(chunks_path):
                 return False
             
-            with open(chunks_path, "r") as f:
-                chunks = json.load(f)
+            with open(chunks_path, "rb") as f:
+                chunks = orjson.loads(f.read())
             
             # Delete existing index
             self.delete_session_index(session_id)
@@ -277,11 +652,12 @@ class KenshoVectorStore:
         if not os.path.exists(self.sessions_dir):
             return sessions
         
-        for session_id in os.listdir(self.sessions_dir):
-            session_path = os.path.join(self.sessions_dir, session_id)
-            print(session_path)
-            if os.path.isdir(session_path):
-                stats = self.get_session_stats(session_id)
+        with os.scandir(self.sessions_dir) as entries:
+            session_ids = [entry.name for entry in entries if entry.is_dir()]
+        
+        # Each stats call is a few small file reads; overlap them across sessions
+        with ThreadPoolExecutor(max_workers=SESSION_STATS_MAX_WORKERS) as pool:
+            for stats in pool.map(self.get_session_stats, session_ids):
                 if stats and stats['index_exists']:
                     sessions.append(stats)
         
@@ -6,10 +6,24 @@ Automated setup and configuration for Kensho AI Learning Assistant.
 
 import os
 import sys
+import re
 import subprocess
-import shutil
+import importlib.metadata
 from pathlib import Path
 
+# Non-interactive pip with no self-version check
+PIP_ENV = {
+    **os.environ,
+    "PIP_NO_INPUT": "1",
+    "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+}
+
+# Oldest supported interpreter
+MIN_PYTHON_VERSION = (3, 8)
+
+# Optional pinned lockfile; preferred over requirements.txt when present
+LOCK_FILE = "requirements.lock"
+
 def print_banner():
     """Print the Kensho banner."""
     banner = """
@@ -26,25 +40,73 @@ def check_python_version():
     """Check if Python version is compatible."""
     print("🐍 Checking Python version...")
     
-    version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print(f"❌ Python {version.major}.{version.minor} is not supported")
-        print("   Kensho requires Python 3.8 or higher")
+    major, minor, micro = sys.version_info[:3]
+    if sys.version_info < MIN_PYTHON_VERSION:
+        print(f"❌ Python {major}.{minor} is not supported")
+        print(f"   Kensho requires Python {'.'.join(map(str, MIN_PYTHON_VERSION))} or higher")
         return False
     
-    print(f"✅ Python {version.major}.{version.minor}.{version.micro} is compatible")
+    print(f"✅ Python {major}.{minor}.{micro} is compatible")
     return True
 
+def _is_requirement_satisfied(requirement, extras=()):
+    """Check one requirement (and the packages its extras pull in) against installed versions."""
+    from packaging.requirements import Requirement
+    
+    if requirement.marker and not any(
+        requirement.marker.evaluate({"extra": extra}) for extra in (extras or ("",))
+    ):
+        return True
+    
+    try:
+        installed = importlib.metadata.version(requirement.name)
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    if not requirement.specifier.contains(installed, prereleases=True):
+        return False
+    
+    if requirement.extras:
+        extra_requirements = [Requirement(r) for r in importlib.metadata.requires(requirement.name) or []]
+        return all(
+            _is_requirement_satisfied(r, tuple(requirement.extras))
+            for r in extra_requirements if r.marker
+        )
+    return True
+
+def _are_requirements_satisfied(requirements_file="requirements.txt"):
+    """True if every requirement is already installed, so pip need not be started at all."""
+    try:
+        from packaging.requirements import Requirement, InvalidRequirement
+    except ImportError:
+        # Fresh environment without packaging: let pip decide
+        return False
+    
+    try:
+        lines = Path(requirements_file).read_text().splitlines()
+        requirements = [Requirement(line) for line in map(str.strip, lines) if line and not line.startswith("#")]
+        return all(_is_requirement_satisfied(r) for r in requirements)
+    except (OSError, InvalidRequirement):
+        return False
+
 def install_dependencies():
     """Install required dependencies."""
     print("📦 Installing dependencies...")
     
+    # Repeat runs: skip pip's start-up and resolver walk when nothing is missing
+    if not Path(LOCK_FILE).exists() and _are_requirements_satisfied():
+        print("✅ Dependencies already installed")
+        return True
+    
     try:
-        # Upgrade pip first
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
+        if Path(LOCK_FILE).exists():
+            # Fully pinned, hashed lockfile (pip-compile --generate-hashes): nothing left to
+            # resolve, so skip the resolver and dependency backtracking entirely
+            command = ["install", "--prefer-binary", "--no-deps", "--require-hashes", "-r", LOCK_FILE]
+        else:
+            # Upgrade pip and install requirements in one pip run (one interpreter + pip start-up)
+            command = ["install", "--prefer-binary", "--upgrade", "pip", "-r", "requirements.txt"]
         
-        # Install requirements
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        subprocess.check_call([sys.executable, "-m", "pip", *command], env=PIP_ENV)
         
         print("✅ Dependencies installed successfully")
         return True
@@ -61,16 +123,28 @@ def setup_environment():
     env_file = Path(".env")
     template_file = Path("env_example.txt")
     
-    if env_file.exists():
+    # Exclusive create: detects an existing .env and claims a new one in a single step
+    try:
+        env_handle = env_file.open("x")
+    except FileExistsError:
         print("✅ .env file already exists")
         return True
     
-    if not template_file.exists():
+    # Any failure before the copy completes removes .env again, so the next run retries
+    # instead of finding an empty file and reporting it as configured
+    try:
+        with env_handle:
+            env_content = template_file.read_text()
+            
+            # Copy template to .env
+            env_handle.write(env_content)
+    except FileNotFoundError:
+        env_file.unlink()
         print("❌ Template file not found")
         return False
-    
-    # Copy template to .env
-    shutil.copy(template_file, env_file)
+    except BaseException:
+        env_file.unlink()
+        raise
     print("✅ Created .env file from template")
     
     # Prompt for API keys
@@ -82,34 +156,34 @@ def setup_environment():
     print("3. Groq API (for YouTube) - Free tier available")
     print()
     
-    # Read current .env content
-    with open(env_file, 'r') as f:
-        env_content = f.read()
+    # Placeholder -> entered key; only keys the user actually provided are substituted
+    subs = {}
     
     # Ask for Gemini API key
     gemini_key = input("Enter your Gemini API key (or press Enter to skip): ").strip()
     if gemini_key:
-        env_content = env_content.replace("your_gemini_api_key_here", gemini_key)
+        subs["your_gemini_api_key_here"] = gemini_key
         print("✅ Gemini API key configured")
     
     # Ask for Groq API key
     groq_key = input("Enter your Groq API key (or press Enter to skip): ").strip()
     if groq_key:
-        env_content = env_content.replace("your_groq_api_key_here", groq_key)
+        subs["your_groq_api_key_here"] = groq_key
         print("✅ Groq API key configured")
     
     # Ask for OpenAI API key if no Gemini key
     if not gemini_key:
         openai_key = input("Enter your OpenAI API key (required if no Gemini key): ").strip()
         if openai_key:
-            env_content = env_content.replace("your_openai_api_key_here", openai_key)
+            subs["your_openai_api_key_here"] = openai_key
             print("✅ OpenAI API key configured")
         else:
             print("⚠️  No AI API key configured. You'll need to add one manually.")
     
-    # Write updated .env file
-    with open(env_file, 'w') as f:
-        f.write(env_content)
+    # Rewrite .env in one substitution pass over the template
+    if subs:
+        pattern = re.compile("|".join(re.escape(placeholder) for placeholder in subs))
+        env_file.write_text(pattern.sub(lambda m: subs[m.group(0)], env_content))
     
     return True
 
@@ -117,10 +191,13 @@ def create_directories():
     """Create necessary directories."""
     print("📁 Creating directories...")
     
-    directories = ["sessions", "data", "exports"]
+    # One directory read tells us what already exists; mkdir only runs for what's missing
+    with os.scandir(".") as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
     
-    for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+    for directory in ("sessions", "data", "exports"):
+        if directory not in existing:
+            os.mkdir(directory)
         print(f"✅ Created {directory}/ directory")
     
     return True
@@ -130,47 +207,53 @@ def run_tests():
     print("🧪 Running basic tests...")
     
     try:
-        result = subprocess.run([sys.executable, "test_kensho.py"], 
-                              capture_output=True, text=True)
+        # Output stays raw bytes; it's only decoded when there are failures to show
+        result = subprocess.run([sys.executable, "test_kensho.py"], capture_output=True)
         
         if result.returncode == 0:
             print("✅ All tests passed!")
             return True
         else:
             print("⚠️  Some tests failed:")
-            print(result.stdout)
-            print(result.stderr)
+            print(result.stdout.decode("utf-8", errors="replace"))
+            print(result.stderr.decode("utf-8", errors="replace"))
             return False
             
     except Exception as e:
         print(f"❌ Error running tests: {e}")
         return False
 
+NEXT_STEPS = f"""
+🎉 Setup Complete!
+{"═" * 50}
+Next steps:
+1. 🚀 Launch Kensho:
+   python app.py
+   or
+   python run.py
+
+2. 🌐 Open your browser to:
+   http://localhost:7860
+
+3. 📚 Upload a document or paste text to start learning!
+
+🔗 Useful commands:
+   python app.py --help          # See all options
+   python app.py --share         # Create public link
+   python test_kensho.py         # Run tests (or: python setup.py --run-tests)
+
+📖 For more information, see README.md
+🐛 Report issues: https://github.com/your-username/kensho/issues
+
+🧘‍♂️ Remember: Kensho is your mirror for deep understanding.
+{"═" * 50}
+"""
+
 def print_next_steps():
     """Print next steps for the user."""
-    print("\n🎉 Setup Complete!")
-    print("═" * 50)
-    print("Next steps:")
-    print("1. 🚀 Launch Kensho:")
-    print("   python app.py")
-    print("   or")
-    print("   python run.py")
-    print()
-    print("2. 🌐 Open your browser to:")
-    print("   http://localhost:7860")
-    print()
-    print("3. 📚 Upload a document or paste text to start learning!")
-    print()
-    print("🔗 Useful commands:")
-    print("   python app.py --help          # See all options")
-    print("   python app.py --share         # Create public link")
-    print("   python test_kensho.py         # Run tests")
-    print()
-    print("📖 For more information, see README.md")
-    print("🐛 Report issues: https://github.com/your-username/kensho/issues")
-    print()
-    print("🧘‍♂️ Remember: Kensho is your mirror for deep understanding.")
-    print("═" * 50)
+    # One write for the whole block instead of a print() per line
+    sys.stdout.write(NEXT_STEPS)
+    sys.stdout.flush()
 
 def main():
     """Main setup function."""
@@ -180,10 +263,13 @@ def main():
         ("Checking Python version", check_python_version),
         ("Installing dependencies", install_dependencies),
         ("Setting up environment", setup_environment),
-        ("Creating directories", create_directories),
-        ("Running tests", run_tests)
+        ("Creating directories", create_directories)
     ]
     
+    # The smoke tests cold-import torch, faiss and the embedding model; only on request
+    if "--run-tests" in sys.argv:
+        steps.append(("Running tests", run_tests))
+    
     for step_name, step_func in steps:
         print(f"\n🔄 {step_name}...")
         if not step_func():
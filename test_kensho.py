@@ -4,105 +4,191 @@
 Simple test to verify installation and core functionality.
 """
 
+import io
 import os
 import sys
+import time
+import importlib
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add current directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Running tests buffer their lines here (per thread) and emit them as one write
+_output = threading.local()
+
+def log(message=""):
+    """Print a test's output line, or buffer it while a test is running."""
+    buf = getattr(_output, "buf", None)
+    if buf is None:
+        print(message)
+    else:
+        print(message, file=buf)
+
+def emit(text):
+    """Write a block of output with a single stdout write."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+def run_test(test, *args):
+    """Run one test, turning an unexpected exception into a failure."""
+    try:
+        return bool(test(*args))
+    except Exception as e:
+        log(f"❌ Test {test.__name__} failed with exception: {e}")
+        return False
+
+def run_test_buffered(test, *args):
+    """Run one test with its output buffered; returns (passed, output text)."""
+    _output.buf = io.StringIO()
+    try:
+        return run_test(test, *args), _output.buf.getvalue()
+    finally:
+        _output.buf = None
+
 def test_imports():
     """Test that all modules can be imported."""
-    print("🧪 Testing imports...")
+    log("🧪 Testing imports...")
     
-    try:
-        from kensho import DocumentProcessor, KenshoVectorStore, KenshoAIAssistant
-        print("✅ Core modules imported successfully")
-        return True
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        return False
+    # One module at a time, so a slow cold import (torch, faiss, the model libraries) shows up by name
+    for module_name in ("kensho.document_processor", "kensho.vector_store", "kensho.ai_assistant"):
+        try:
+            start = time.perf_counter()
+            importlib.import_module(module_name)
+            log(f"⏱️  {module_name} imported in {time.perf_counter() - start:.2f}s")
+        except ImportError as e:
+            log(f"❌ Import error in {module_name}: {e}")
+            return False
+    
+    log("✅ Core modules imported successfully")
+    return True
 
-def test_document_processor():
+def test_document_processor(work_dir):
     """Test document processing functionality."""
-    print("🧪 Testing document processor...")
+    log("🧪 Testing document processor...")
     
     try:
         from kensho import DocumentProcessor
         
-        # Create temporary directory for testing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            processor = DocumentProcessor(sessions_dir=temp_dir)
-            
-            # Test text processing
-            test_text = "This is a test document for Kensho. It contains some sample text to verify the processing functionality."
-            session_id, full_text, chunks = processor.process_text(test_text, "test_document")
-            
-            assert session_id is not None
-            assert full_text == test_text
-            assert len(chunks) > 0
-            assert chunks[0]['text'] == test_text
-            
-            print("✅ Document processor working correctly")
-            return True
-            
+        # Own subdirectory of the shared test directory
+        os.mkdir(work_dir)
+        processor = DocumentProcessor(sessions_dir=work_dir)
+        
+        # Test text processing
+        test_text = "This is a test document for Kensho. It contains some sample text to verify the processing functionality."
+        session_id, full_text, chunks = processor.process_text(test_text, "test_document")
+        
+        assert session_id is not None
+        assert full_text == test_text
+        assert len(chunks) > 0
+        assert chunks[0]['text'] == test_text
+        
+        # Content cache round trip: a hit needs the session's index file on disk
+        from kensho.content_cache import ContentCache
+        cache = ContentCache(root_dir=os.path.join(work_dir, ".content_cache"), sessions_dir=work_dir)
+        text_path = os.path.join(work_dir, "upload.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(test_text)
+        key = cache.hash_file(text_path)
+        assert key == cache.hash_file(text_path)
+        
+        cache.put(key, session_id, full_text, len(chunks))
+        assert cache.get(key) is None, "Cache hit without a built index"
+        os.makedirs(os.path.join(work_dir, session_id), exist_ok=True)
+        open(os.path.join(work_dir, session_id, "vector_index.faiss"), "wb").close()
+        cached = cache.get(key)
+        assert cached and cached['session_id'] == session_id and cached['full_text'] == full_text
+        cache.invalidate(key)
+        assert cache.get(key) is None
+        
+        log("✅ Document processor working correctly")
+        return True
+        
     except Exception as e:
-        print(f"❌ Document processor error: {e}")
+        log(f"❌ Document processor error: {e}")
         return False
 
-def test_vector_store():
+def test_vector_store(work_dir):
     """Test vector store functionality."""
-    print("🧪 Testing vector store...")
+    log("🧪 Testing vector store...")
     
     try:
         from kensho import KenshoVectorStore
         
-        # Create temporary directory for testing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            vector_store = KenshoVectorStore(sessions_dir=temp_dir)
-            
-            # Create test chunks
-            test_chunks = [
-                {
-                    'id': 0,
-                    'text': 'Machine learning is a subset of artificial intelligence.',
-                    'type': 'text',
-                    'source': 'test',
-                    'source_info': {},
-                    'chunk_index': 0,
-                    'total_chunks': 2
-                },
-                {
-                    'id': 1,
-                    'text': 'Deep learning uses neural networks with multiple layers.',
-                    'type': 'text',
-                    'source': 'test',
-                    'source_info': {},
-                    'chunk_index': 1,
-                    'total_chunks': 2
-                }
-            ]
-            
-            # Test index building
-            success = vector_store.build_index("test_session", test_chunks)
-            assert success, "Failed to build index"
-            
-            # Test searching
-            results = vector_store.search("test_session", "What is machine learning?", top_k=1)
-            assert len(results) > 0, "No search results returned"
-            assert 'machine learning' in results[0]['text'].lower()
-            
-            print("✅ Vector store working correctly")
-            return True
-            
+        # Own subdirectory of the shared test directory
+        os.mkdir(work_dir)
+        vector_store = KenshoVectorStore(sessions_dir=work_dir)
+        
+        # Stores share one process-wide embedding model instead of loading their own
+        assert KenshoVectorStore(sessions_dir=work_dir).embedding_model is vector_store.embedding_model
+        
+        # Create test chunks
+        test_chunks = [
+            {
+                'id': 0,
+                'text': 'Machine learning is a subset of artificial intelligence.',
+                'type': 'text',
+                'source': 'test',
+                'source_info': {},
+                'chunk_index': 0,
+                'total_chunks': 2
+            },
+            {
+                'id': 1,
+                'text': 'Deep learning uses neural networks with multiple layers.',
+                'type': 'text',
+                'source': 'test',
+                'source_info': {},
+                'chunk_index': 1,
+                'total_chunks': 2
+            }
+        ]
+        
+        # Test index building
+        success = vector_store.build_index("test_session", test_chunks)
+        assert success, "Failed to build index"
+        
+        # Test searching
+        results = vector_store.search("What is machine learning?", session_id="test_session", top_k=1)
+        assert len(results) > 0, "No search results returned"
+        assert 'machine learning' in results[0]['text'].lower()
+        
+        # Test in-place update: remove the first chunk and append a new one
+        new_chunk = {
+            'id': 0,
+            'text': 'Photosynthesis lets plants turn sunlight into chemical energy.',
+            'type': 'text',
+            'source': 'test_update',
+            'source_info': {},
+            'chunk_index': 0,
+            'total_chunks': 1
+        }
+        success = vector_store.update_index("test_session", [new_chunk], removed_ids=[0])
+        assert success, "Failed to update index"
+        
+        # Chunk ids are renumbered to positions, matching the index's vector ids
+        updated_chunks = vector_store.get_session_chunks("test_session")
+        assert [chunk['id'] for chunk in updated_chunks] == [0, 1]
+        assert [chunk['text'] for chunk in updated_chunks] == [test_chunks[1]['text'], new_chunk['text']]
+        
+        results = vector_store.search("How do plants use sunlight?", session_id="test_session", top_k=1)
+        assert results and results[0]['text'] == new_chunk['text'], "Appended chunk not found"
+        results = vector_store.search("What is machine learning?", session_id="test_session", top_k=2)
+        assert len(results) == 2 and test_chunks[0]['text'] not in [r['text'] for r in results], "Removed chunk still returned"
+        
+        log("✅ Vector store working correctly")
+        return True
+        
     except Exception as e:
-        print(f"❌ Vector store error: {e}")
+        log(f"❌ Vector store error: {e}")
         return False
 
 def test_ai_assistant():
     """Test AI assistant functionality (without API calls)."""
-    print("🧪 Testing AI assistant...")
+    log("🧪 Testing AI assistant...")
     
     try:
         from kensho import KenshoAIAssistant
@@ -123,37 +209,48 @@ def test_ai_assistant():
         assert 'Test content' in context
         assert '[source: page 1]' in context
         
-        print("✅ AI assistant initialized correctly")
+        # Exact-match response cache hands back copies, not the stored object
+        cache_key = ("summary", assistant._hash_text("Test content"), "comprehensive", 500)
+        assistant._response_cache_put(cache_key, {'summary': 'cached', 'key_topics': []})
+        cached = assistant._response_cache_get(cache_key)
+        assert cached == {'summary': 'cached', 'key_topics': []}
+        cached['key_topics'].append('mutated')
+        assert assistant._response_cache_get(cache_key)['key_topics'] == []
+        
+        log("✅ AI assistant initialized correctly")
         return True
         
     except Exception as e:
-        print(f"❌ AI assistant error: {e}")
+        log(f"❌ AI assistant error: {e}")
         return False
 
 def test_environment():
     """Test environment setup."""
-    print("🧪 Testing environment...")
+    log("🧪 Testing environment...")
     
-    # Check for API keys
-    gemini_key = os.getenv("GEMINI_API_KEY")
-    groq_key = os.getenv("GROQ_API_KEY")
-    openai_key = os.getenv("OPENAI_API_KEY")
+    # Check for API keys: .env is parsed once into a plain dict (os.environ is left untouched),
+    # with the process environment as the fallback
+    from dotenv import dotenv_values
+    env_file = dotenv_values(".env")
+    gemini_key = env_file.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
+    groq_key = env_file.get("GROQ_API_KEY") or os.getenv("GROQ_API_KEY")
+    openai_key = env_file.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
     
     if not gemini_key and not openai_key:
-        print("⚠️  No AI API keys found (GEMINI_API_KEY or OPENAI_API_KEY)")
-        print("   This is OK for testing, but you'll need API keys to run Kensho")
+        log("⚠️  No AI API keys found (GEMINI_API_KEY or OPENAI_API_KEY)")
+        log("   This is OK for testing, but you'll need API keys to run Kensho")
         return True
     
     if gemini_key:
-        print("✅ Gemini API key found")
+        log("✅ Gemini API key found")
     
     if openai_key:
-        print("✅ OpenAI API key found")
+        log("✅ OpenAI API key found")
         
     if groq_key:
-        print("✅ Groq API key found")
+        log("✅ Groq API key found")
     else:
-        print("⚠️  No Groq API key found (YouTube transcription will not work)")
+        log("⚠️  No Groq API key found (YouTube transcription will not work)")
     
     return True
 
@@ -162,28 +259,52 @@ def main():
     print("🌌 Kensho - Running Basic Tests")
     print("=" * 50)
     
-    tests = [
+    # Environment and import checks run first, so import errors surface before anything else
+    sequential_tests = [
         test_environment,
-        test_imports,
-        test_document_processor,
-        test_vector_store,
-        test_ai_assistant
+        test_imports
     ]
     
     passed = 0
     failed = 0
     
-    for test in tests:
-        try:
-            if test():
-                passed += 1
-            else:
-                failed += 1
-        except Exception as e:
-            print(f"❌ Test {test.__name__} failed with exception: {e}")
+    for test in sequential_tests:
+        ok, output = run_test_buffered(test)
+        emit(output + "\n")
+        if ok:
+            passed += 1
+        else:
             failed += 1
+    
+    # Load the shared embedding model once up front, so the concurrent tests reuse it
+    # rather than queueing behind whichever of them triggers the cold load
+    try:
+        from kensho.vector_store import get_embedding_model
+        from kensho.ai_assistant import EMBEDDING_MODEL
+        get_embedding_model(EMBEDDING_MODEL)
+    except Exception as e:
+        print(f"⚠️  Embedding model not preloaded: {e}")
         print()
     
+    # One temp directory for all stateful tests, each working in its own subdirectory,
+    # so it is created and removed once
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Independent tests with their own objects; their disk and model work overlaps,
+        # and each one's output is printed as a block once it finishes
+        concurrent_tests = [
+            (test_document_processor, os.path.join(temp_dir, "docproc")),
+            (test_vector_store, os.path.join(temp_dir, "vs")),
+            (test_ai_assistant,)
+        ]
+        
+        with ThreadPoolExecutor(max_workers=len(concurrent_tests)) as pool:
+            for ok, output in pool.map(lambda test: run_test_buffered(*test), concurrent_tests):
+                emit(output + "\n")
+                if ok:
+                    passed += 1
+                else:
+                    failed += 1
+    
     print("=" * 50)
     print(f"🧪 Test Results: {passed} passed, {failed} failed")
     